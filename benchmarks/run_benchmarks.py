@@ -0,0 +1,388 @@
+"""
+ベンチマークスイート
+
+AdvancedImageProcessor の各処理、PresetManager の全プリセット、
+プレビュー描画と同じレンダリングチェーン、各エクスポート処理を
+複数のソースサイズで計測し、結果（時間・ピークメモリ・出力バイト数）を
+JSONに書き出す。--compare で保存済みのベースラインと比較し、
+しきい値を超えて遅く（または大きく）なった項目を報告する。
+
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+"""
+import os
+import sys
+
+# 画面のない環境でも動くようにする（main の import より前に設定）
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import ctypes
+import gc
+import json
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import PIL
+import PySide6
+from PIL import Image, ImageChops, ImageDraw
+
+from main import (
+    BATCH_TARGETS,
+    AdvancedImageProcessor,
+    IconExporter,
+    PresetManager,
+    RenderCache,
+    RenderPipeline,
+    image_nbytes,
+)
+
+DEFAULT_SIZES = [256, 1024, 2048, 4096]
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+
+# これより小さい差は計測誤差とみなして比較しない
+MIN_DELTAS = {
+    'time_s': 0.005,
+    'peak_mem_bytes': 4 * 1024 * 1024,
+    'output_bytes': 1024,
+}
+
+# レンダリングチェーンで使うパラメータ（すべての段を有効にする）
+CHAIN_PARAMS = {
+    'brightness': 10,
+    'contrast': 15,
+    'saturation': 20,
+    'sharpness': 10,
+    'blur': 1,
+    'rounded_corners': True,
+    'shadow': True,
+    'border': True,
+    'glass_effect': True,
+    'padding': 20,
+    'gradient': True,
+}
+
+
+class RssSampler:
+    """/proc から常駐メモリを定期的に読み取り、ピークを記録する"""
+
+    STATM = '/proc/self/statm'
+    INTERVAL = 0.002
+
+    def __init__(self):
+        self.available = os.path.exists(self.STATM)
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if self.available else 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def rss(self):
+        with open(self.STATM) as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            time.sleep(self.INTERVAL)
+
+    def __enter__(self):
+        if self.available:
+            self.base = self.rss()
+            self.peak = self.base
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self.rss())
+
+    def peak_delta(self):
+        """開始時からのピーク増加量（計測できない環境では None）"""
+        if not self.available:
+            return None
+        return self.peak - self.base
+
+
+def make_source(size):
+    """計測用の決定的なソース画像（グラデーション＋ノイズ＋透過の角）"""
+    red = Image.linear_gradient('L').resize((size, size))
+    green = Image.radial_gradient('L').resize((size, size))
+    blue = ImageChops.invert(red).rotate(90)
+    noise = Image.frombytes('L', (size, size), random.Random(size).randbytes(size * size))
+    alpha = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(alpha).rounded_rectangle(
+        [(size // 16, size // 16), (size - size // 16, size - size // 16)],
+        radius=size // 8, fill=255
+    )
+    return Image.merge('RGBA', (ImageChops.add(red, noise, 4.0, -32), green, blue, alpha))
+
+
+def release_memory():
+    """解放済みのヒープをOSへ返す（ピークメモリの差分を正しく測るため）"""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        # glibc 以外では何もしない
+        pass
+
+
+def clear_caches():
+    """処理系のメモ化キャッシュをすべて破棄（計測を常にコールドにする）"""
+    for owner in (AdvancedImageProcessor, RenderPipeline):
+        for value in vars(owner).values():
+            if isinstance(value, RenderCache):
+                value.clear()
+
+
+def processor_cases():
+    """AdvancedImageProcessor の公開処理"""
+    P = AdvancedImageProcessor
+    return [
+        ('add_drop_shadow', lambda im: P.add_drop_shadow(im)),
+        ('create_rounded_corners', lambda im: P.create_rounded_corners(im, im.width // 8)),
+        ('create_shape_mask', lambda im: P.create_shape_mask(im.size, 'squircle')),
+        ('apply_mask', lambda im: P.apply_mask(im, Image.new('L', im.size, 128))),
+        ('create_gradient', lambda im: P.create_gradient(im.size, direction='radial')),
+        ('add_gradient_background', lambda im: P.add_gradient_background(im)),
+        ('add_padding', lambda im: P.add_padding(im, im.width // 10)),
+        ('add_border', lambda im: P.add_border(im)),
+        ('adjust_colors', lambda im: P.adjust_colors(im, 1.1, 1.15, 1.2, 1.1)),
+        ('apply_glass_effect', lambda im: P.apply_glass_effect(im)),
+        ('crop_to_square', lambda im: P.crop_to_square(im.crop((0, 0, im.width, im.height * 3 // 4)))),
+        ('create_circular_mask', lambda im: P.create_circular_mask(im)),
+        ('create_squircle_mask', lambda im: P.create_squircle_mask(im)),
+        ('add_noise', lambda im: P.add_noise(im)),
+    ]
+
+
+def preset_cases():
+    """PresetManager の全プリセット"""
+    return [
+        (name, lambda im, name=name: PresetManager.apply_preset(im.copy(), name))
+        for name in PresetManager.PRESETS
+    ]
+
+
+def chain_cases():
+    """スライダー操作時と同じレンダリングチェーン"""
+    params = RenderPipeline.normalize_params(CHAIN_PARAMS)
+
+    def warm(im):
+        # 1回目でキャッシュを温めてから、同じ入力をもう一度描画する
+        RenderPipeline.render(im, params, tiled=False)
+        start = time.perf_counter()
+        result = RenderPipeline.render(im, params, tiled=False)
+        return result, time.perf_counter() - start
+
+    return [
+        ('render', lambda im: RenderPipeline.render(im, params, tiled=False)),
+        ('render_warm', warm),
+        ('render_tiled', lambda im: RenderPipeline.render(im, params, tiled=True)),
+    ]
+
+
+def export_cases():
+    """エクスポートの各書き出し処理（IconGeneratorThread と同じ IconExporter）
+
+    PNGセットは既定以外のPNGプロファイルでも計測する（png_set_<プロファイル>）。
+    """
+    def writer(target, png_profile=IconExporter.DEFAULT_PNG_PROFILE):
+        def run(im):
+            with tempfile.TemporaryDirectory() as folder:
+                options = {target: True, 'png_profile': png_profile}
+                IconExporter(im, folder, options).run_target(target)
+                return sum(p.stat().st_size for p in Path(folder).rglob('*') if p.is_file())
+        return run
+
+    cases = [(target, writer(target)) for target in BATCH_TARGETS]
+    cases += [
+        (f'png_set_{profile}', writer('png_set', profile))
+        for profile in IconExporter.PNG_PROFILES
+        if profile != IconExporter.DEFAULT_PNG_PROFILE
+    ]
+    return cases
+
+
+GROUPS = {
+    'processor': processor_cases,
+    'preset': preset_cases,
+    'chain': chain_cases,
+    'export': export_cases,
+}
+
+
+def output_bytes(result):
+    """処理結果の大きさ（画像はピクセルデータ、エクスポートはファイルの合計）"""
+    if isinstance(result, int):
+        return result
+    return image_nbytes(result)
+
+
+def measure(func, source, repeat):
+    """func(source) を repeat 回計測する
+
+    計測の前に1回だけ計測せずに実行し（遅延 import や初回呼び出しの準備を
+    計測から外す）、その結果から出力サイズを求める。
+    """
+    clear_caches()
+    result = func(source)
+    if isinstance(result, tuple):
+        result = result[0]
+    size = output_bytes(result)
+    del result
+
+    times = []
+    peaks = []
+    result = None
+    for _ in range(repeat):
+        clear_caches()
+        release_memory()
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            result = func(source)
+            elapsed = time.perf_counter() - start
+        # 計測対象が自分で区間を測った場合は (結果, 時間) を返す
+        if isinstance(result, tuple):
+            result, elapsed = result
+        times.append(elapsed)
+        peaks.append(sampler.peak_delta())
+        del result
+        result = None
+
+    return {
+        'time_s': statistics.median(times),
+        'time_min_s': min(times),
+        'peak_mem_bytes': max(peaks) if None not in peaks else None,
+        'output_bytes': size,
+    }
+
+
+def run_benchmarks(sizes, groups, repeat, name_filter=None):
+    results = []
+    for size in sizes:
+        source = make_source(size)
+        for group in groups:
+            for name, func in GROUPS[group]():
+                case_id = f'{group}/{name}/{size}'
+                if name_filter and name_filter not in case_id:
+                    continue
+                record = {'id': case_id, 'group': group, 'name': name, 'size': size}
+                record.update(measure(func, source, repeat))
+                results.append(record)
+                peak = record['peak_mem_bytes']
+                print(
+                    f"{case_id:<48} {record['time_s'] * 1000:10.1f} ms"
+                    f"  {peak / (1024 * 1024) if peak is not None else float('nan'):8.1f} MB"
+                    f"  {record['output_bytes']:>12,} B"
+                )
+    return results
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'pyside6': PySide6.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def is_parallel(record):
+    """スレッドプールで並列に処理する項目か（時間がCPU数で変わる）"""
+    return record['group'] == 'export' or record['name'] == 'render_tiled'
+
+
+def compare(results, baseline, threshold):
+    """ベースラインと比較して、しきい値を超えた悪化を返す
+
+    ベースラインとCPU数が違う場合、並列に処理する項目の時間は比較しない。
+    """
+    base = {record['id']: record for record in baseline['results']}
+    same_cpus = baseline.get('environment', {}).get('cpu_count') == os.cpu_count()
+    regressions = []
+    for record in results:
+        old = base.get(record['id'])
+        if old is None:
+            continue
+        for metric in ('time_s', 'peak_mem_bytes', 'output_bytes'):
+            if metric == 'time_s' and not same_cpus and is_parallel(record):
+                continue
+            before, after = old.get(metric), record.get(metric)
+            if not before or after is None or after - before < MIN_DELTAS[metric]:
+                continue
+            ratio = after / before
+            if ratio > 1 + threshold:
+                regressions.append((record['id'], metric, before, after, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='画像処理とエクスポートのベンチマーク')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='ソース画像の一辺のサイズ'
+    )
+    parser.add_argument(
+        '--groups', nargs='+', choices=list(GROUPS), default=list(GROUPS), help='計測するグループ'
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=DEFAULT_REPEAT, help='各項目の計測回数（中央値を記録）'
+    )
+    parser.add_argument('-k', '--filter', help='ID（グループ/名前/サイズ）に含まれる文字列で絞り込む')
+    parser.add_argument('-o', '--output', help='結果を書き出すJSONファイル')
+    parser.add_argument('--compare', help='比較するベースラインのJSONファイル')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='悪化とみなす増加率（0.25 = 25%%）'
+    )
+    args = parser.parse_args(argv)
+    # 計測スレッドを作る前に、書き出すファイルの権限を決めておく
+    IconExporter.init_file_mode()
+
+    print(f'ベンチマーク: サイズ {args.sizes} / 計測 {args.repeat} 回')
+    results = run_benchmarks(args.sizes, args.groups, args.repeat, args.filter)
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'結果を書き出しました: {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        base_cpus = baseline.get('environment', {}).get('cpu_count')
+        if base_cpus != os.cpu_count():
+            print(
+                f'\nベースラインのCPU数（{base_cpus}）がこの環境（{os.cpu_count()}）と違うため、'
+                '並列に処理する項目の時間は比較しません'
+            )
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} 件の悪化（しきい値 {args.threshold:.0%}）:')
+            for case_id, metric, before, after, ratio in regressions:
+                print(f'  {case_id:<48} {metric:<15} {before:>14.4g} -> {after:<14.4g} ({ratio:.2f}x)')
+            return 1
+        print(f'\nベースラインからの悪化はありません（しきい値 {args.threshold:.0%}）')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
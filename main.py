@@ -1,20 +1,916 @@
+import time
+
+# 起動時間計測の基準（重いimportより前に記録する）
+STARTUP_TIME = time.perf_counter()
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QFileDialog, QProgressBar, QTabWidget,
-    QSlider, QColorDialog, QCheckBox, QComboBox, QGroupBox,
-    QSpinBox, QMessageBox, QSplitter, QScrollArea, QFrame,
-    QLineEdit, QListWidget, QDialog, QDialogButtonBox
+    QPushButton, QLabel, QProgressBar, QTabWidget,
+    QSlider, QCheckBox, QComboBox, QGroupBox,
+    QSplitter, QScrollArea, QFrame, QDialog
 )
-from PySide6.QtCore import Qt, QThread, Signal, QSize, QTimer
-from PySide6.QtGui import QPixmap, QImage, QColor, QPainter, QFont, QIcon, QPalette
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance, ImageOps
+from PySide6.QtCore import Qt, QThread, Signal, QTimer, QObject
+from PySide6.QtGui import QPixmap, QImage, QColor, QFont, QPalette, QAction
+from PIL import Image
 import sys
 import os
-import platform
 import json
+import atexit
+import threading
+from collections import OrderedDict
+# 起動を速くするため、最初の描画に要らないものは使う関数の中で import する
+#   一括処理: ProcessPoolExecutor（multiprocessing）、as_completed、argparse、glob
+#   書き出し・キャッシュ・影の描画: hashlib、tempfile、struct、datetime、platform
+#   画像処理: PIL の ImageDraw、ImageFilter、ImageEnhance、ImageChops
+#   ダイアログとボタンの処理: QFileDialog、QColorDialog、QMessageBox、QListWidget など
+#   （PySide6 の型は最初に参照したときに列挙型などを作るため、名前の import にも時間がかかる）
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 from pathlib import Path
-from datetime import datetime
-import copy
+import contextlib
+import math
+import functools
+import io
+import random
+import weakref
+import zlib
+
+
+class RenderTracer:
+    """処理段ごとの所要時間を記録する軽量トレーサー
+    
+    span() で囲んだ区間をスレッドごとに入れ子で計測する。frame() の中では
+    各区間の自己時間（子の区間を除いた時間）を名前ごとに集計して last_frames に残し、
+    記録中は Chrome のトレース形式（chrome://tracing や Perfetto で表示可能）の
+    イベントも保存する。
+    """
+    
+    _local = threading.local()
+    _lock = threading.Lock()
+    _origin = time.perf_counter()
+    
+    recording = False
+    events = []
+    thread_names = {}
+    last_frames = {}  # フレーム名 -> {'total': 秒, 'stages': {区間名: 自己時間}}
+    
+    profiling = False
+    _profiles = []
+    _profiled_thread = None
+    
+    @classmethod
+    def _stack(cls):
+        stack = getattr(cls._local, 'stack', None)
+        if stack is None:
+            stack = cls._local.stack = []
+        return stack
+    
+    @classmethod
+    @contextlib.contextmanager
+    def span(cls, name, category='op'):
+        """区間を計測する"""
+        frame = getattr(cls._local, 'frame', None)
+        if frame is None and not cls.recording:
+            yield
+            return
+        
+        stack = cls._stack()
+        children = [0.0]  # 子の区間の合計時間
+        stack.append(children)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            if frame is not None:
+                with cls._lock:
+                    frame[name] = frame.get(name, 0.0) + elapsed - children[0]
+            if cls.recording:
+                cls._add_event(name, category, start, elapsed)
+    
+    @classmethod
+    @contextlib.contextmanager
+    def frame(cls, name):
+        """区間内の処理時間を集計して last_frames[name] に残す"""
+        stages = {}
+        outer = getattr(cls._local, 'frame', None)
+        cls._local.frame = stages
+        start = time.perf_counter()
+        try:
+            with cls.span(name, 'frame'):
+                yield stages
+        finally:
+            cls._local.frame = outer
+            cls.last_frames[name] = {'total': time.perf_counter() - start, 'stages': stages}
+    
+    @classmethod
+    def current_frame(cls):
+        """このスレッドで集計中のフレーム（なければ None）"""
+        return getattr(cls._local, 'frame', None)
+    
+    @classmethod
+    @contextlib.contextmanager
+    def attach(cls, frame):
+        """別スレッドで集計中のフレームに、このスレッドの区間も加える"""
+        outer = getattr(cls._local, 'frame', None)
+        cls._local.frame = frame
+        try:
+            yield
+        finally:
+            cls._local.frame = outer
+    
+    @classmethod
+    def traced(cls, func):
+        """関数の呼び出しを関数名の区間として計測するデコレーター"""
+        name = func.__name__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with cls.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    
+    @classmethod
+    def breakdown(cls, name, top=4):
+        """last_frames[name] を「合計 (内訳)」の文字列にする"""
+        frame = cls.last_frames.get(name)
+        if frame is None:
+            return None
+        # フレーム自身の自己時間（計測区間外の処理や待ち時間）は内訳に含めない
+        stages = sorted(
+            ((stage, seconds) for stage, seconds in frame['stages'].items() if stage != name),
+            key=lambda item: item[1], reverse=True
+        )
+        details = ' / '.join(f'{stage} {seconds * 1000:.1f}' for stage, seconds in stages[:top])
+        return f"{frame['total'] * 1000:.1f}ms（{details}）"
+    
+    @classmethod
+    def _add_event(cls, name, category, start, elapsed):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - cls._origin) * 1e6,
+            'dur': elapsed * 1e6,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+        }
+        with cls._lock:
+            cls.events.append(event)
+            cls.thread_names[thread.ident] = thread.name
+    
+    @classmethod
+    def start_recording(cls):
+        """トレースの記録を開始"""
+        with cls._lock:
+            cls.events = []
+            cls.thread_names = {}
+        cls.recording = True
+    
+    @classmethod
+    def stop_recording(cls, file_path=None):
+        """記録を止め、file_path があればトレースJSONとして保存。イベント数を返す"""
+        cls.recording = False
+        with cls._lock:
+            events = list(cls.events)
+            names = dict(cls.thread_names)
+        
+        if file_path:
+            pid = os.getpid()
+            metadata = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in names.items()
+            ]
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+    
+    @classmethod
+    def start_profiling(cls):
+        """呼び出したスレッドと、以後 profiled() を通るスレッドのプロファイルを開始"""
+        import cProfile
+        profile = cProfile.Profile()
+        with cls._lock:
+            cls._profiles = [profile]
+        cls._profiled_thread = threading.get_ident()
+        cls.profiling = True
+        profile.enable()
+    
+    @classmethod
+    def profiled(cls, func, *args):
+        """プロファイル中なら func をこのスレッド用のプロファイラで実行"""
+        # 開始したスレッドは既にプロファイル中
+        if not cls.profiling or threading.get_ident() == cls._profiled_thread:
+            return func(*args)
+        import cProfile
+        profile = cProfile.Profile()
+        with cls._lock:
+            cls._profiles.append(profile)
+        return profile.runcall(func, *args)
+    
+    @classmethod
+    def stop_profiling(cls, file_path=None):
+        """プロファイルを止め、file_path があれば pstats 形式で保存"""
+        import pstats
+        cls.profiling = False
+        cls._profiled_thread = None
+        with cls._lock:
+            profiles, cls._profiles = cls._profiles, []
+        profiles[0].disable()
+        
+        if file_path:
+            stats = None
+            for profile in profiles:
+                profile.create_stats()
+                if not profile.stats:
+                    continue
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            if stats is not None:
+                stats.dump_stats(file_path)
+
+
+class ResizePyramid:
+    """エクスポートで使う各サイズの縮小画像（サイズごとに一度だけ計算する）
+    
+    各サイズは、段（sizes）のうち2倍以上ある最小のものから縮小する。
+    元画像からの大きな縮小は resize の reducing_gap により整数倍の reduce() を
+    先に行ってから LANCZOS で仕上げる。段は書き出すプラットフォームの選択に
+    よらず固定なので、どのサイズをどこから作るかは元画像の大きさだけで決まり、
+    選択や並列に取り出す順番によって結果が変わることはない。
+    """
+    
+    REDUCING_GAP = 2.0
+    
+    def __init__(self, source_image, sizes, disk_cache=None, cache_key=None, prefix=''):
+        self.source_image = source_image
+        self.sizes = sorted(set(sizes))
+        # cache_key（source_image のダイジェスト）があれば、各段をディスクキャッシュと共有する。
+        # 同じキーで別の画像から作る段は prefix で名前を分ける
+        self.disk_cache = disk_cache if cache_key else None
+        self.cache_key = cache_key
+        self.prefix = prefix
+        self._levels = {}
+        self._locks = {size: threading.Lock() for size in self.sizes}
+        self._lock = threading.Lock()
+    
+    def parent_size(self, size):
+        """size の縮小元になるサイズ（元画像から作る場合は None）"""
+        limit = min(self.source_image.size)
+        for candidate in self.sizes:
+            if size * 2 <= candidate <= limit:
+                return candidate
+        return None
+    
+    def get(self, size):
+        """size×size に縮小した画像を取得（段にないサイズも作れるが、縮小元にはしない）"""
+        with self._lock:
+            lock = self._locks.setdefault(size, threading.Lock())
+        
+        # 小さいサイズから大きいサイズの順にしかロックしないのでデッドロックしない
+        with lock:
+            level = self._levels.get(size)
+            if level is None and self.disk_cache:
+                level = self.disk_cache.get(self.cache_key, f"{self.prefix}{size}")
+            if level is None:
+                parent = self.parent_size(size)
+                base = self.get(parent) if parent else self.source_image
+                level = base.resize(
+                    (size, size),
+                    Image.Resampling.LANCZOS,
+                    reducing_gap=self.REDUCING_GAP
+                )
+                if self.disk_cache:
+                    self.disk_cache.put(self.cache_key, level, f"{self.prefix}{size}")
+            self._levels[size] = level
+            return level
+
+
+def current_umask():
+    """プロセスの umask
+    
+    Linux では /proc から読む。それ以外では一度設定し直すしかなく、その間に
+    ほかのスレッドが作ったファイルの権限が変わるので、エントリポイントで
+    スレッドを作る前に呼ぶ（IconExporter.init_file_mode）。
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+class IconExporter:
+    """アイコンファイルの書き出し（GUI非依存）"""
+    
+    WINDOWS_SIZES = [16, 24, 32, 48, 64, 128, 256]
+    MAC_SIZES = [16, 32, 64, 128, 256, 512, 1024]
+    PNG_SIZES = [16, 32, 48, 64, 128, 256, 512, 1024]
+    FAVICON_SIZES = [16, 32, 48]
+    # 縮小ピラミッドの段（すべてのプラットフォームのサイズとRetina(@2x)）
+    PYRAMID_SIZES = sorted({
+        *WINDOWS_SIZES, *MAC_SIZES, *PNG_SIZES, *FAVICON_SIZES,
+        *(size * 2 for size in MAC_SIZES if size <= 512),
+    })
+    
+    # ICNSの要素（OSType, 一辺）。PNGを格納する型で、Retina(@2x)は同じ大きさの画像を共有する
+    ICNS_TYPES = [
+        (b'icp4', 16), (b'icp5', 32), (b'icp6', 64),
+        (b'ic07', 128), (b'ic08', 256), (b'ic09', 512), (b'ic10', 1024),
+        (b'ic11', 32), (b'ic12', 64), (b'ic13', 256), (b'ic14', 512),
+    ]
+    
+    # ICOの要素は既定ではすべてPNG圧縮で格納する。options の ico_bmp を有効にすると、
+    # この一辺より小さい要素を非圧縮のBMP(32bit)にする（ファイルは大きくなる）
+    #   Windows: 128px 未満をBMP（PNGの要素を読めない古いシェルが使うのは48pxまで）
+    #   Favicon: ブラウザはPNGの要素を読めるので、常にPNG
+    ICO_PNG_MIN_SIZE = {'windows': 128, 'favicon': 0}
+    
+    # PNGエンコードのプロファイル（save() に渡す引数の候補）。候補が複数あれば
+    # すべて並列に試して最も小さいものを使う。Pillowは行ごとのフィルタを自動で
+    # 選ぶため、試すのはzlibの圧縮レベルと戦略の組み合わせ
+    PNG_PROFILES = {
+        'fast': [{'compress_level': 1}],
+        'balanced': [{}],
+        # 配布向け。ICCプロファイルなどのメタデータも書かない
+        'smallest': [
+            {'optimize': True, 'icc_profile': None},
+            {'compress_level': 9, 'compress_type': zlib.Z_RLE, 'icc_profile': None},
+            {'compress_level': 9, 'compress_type': zlib.Z_HUFFMAN_ONLY, 'icc_profile': None},
+        ],
+    }
+    PNG_PROFILE_LABELS = {
+        'fast': '高速（zlib レベル1）',
+        'balanced': '標準',
+        'smallest': '最小サイズ（複数の圧縮方法を試す）',
+    }
+    DEFAULT_PNG_PROFILE = 'balanced'
+    
+    # 新しく作るファイルの権限（open() で作った場合と同じ 0666 & ~umask）。
+    # import 時には決めず、エントリポイントの init_file_mode() か最初の書き込みで決める
+    FILE_MODE = None
+    
+    def __init__(self, source_image, output_path, options, max_workers=None, outputs=None,
+                 disk_cache=None, cache_key=None):
+        self.source_image = source_image
+        self.output_path = output_path
+        self.options = options
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # 書き出す出力ファイル（output_path からの相対パス）。None ならすべて
+        self.outputs = outputs
+        self.png_profile = options.get('png_profile', self.DEFAULT_PNG_PROFILE)
+        if self.png_profile not in self.PNG_PROFILES:
+            raise ValueError(f"不明なPNGプロファイル: {self.png_profile}")
+        self.ico_bmp = bool(options.get('ico_bmp'))
+        # 書き出したファイルごとの {相対パス: (バイト数, エンコード時間[秒])}
+        self.report = {}
+        # 候補が複数あるプロファイルのエンコードに使うプール（run_tasks の実行中だけ存在する）
+        self.trial_executor = None
+        self.pyramid = ResizePyramid(source_image, self.PYRAMID_SIZES, disk_cache, cache_key)
+        # ICOのフレームは縦横比を保ち、透明な余白で正方形にする（正方形の元画像なら同じ段）
+        self.ico_pyramid = self.pyramid
+        if source_image.width != source_image.height:
+            self.ico_pyramid = ResizePyramid(
+                self.letterbox(source_image), self.PYRAMID_SIZES, disk_cache, cache_key, 'box'
+            )
+    
+    @staticmethod
+    def letterbox(image):
+        """長辺に合わせた正方形の透明なキャンバスの中央に image を置く"""
+        side = max(image.size)
+        canvas = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+        canvas.paste(
+            image.convert('RGBA'), ((side - image.width) // 2, (side - image.height) // 2)
+        )
+        return canvas
+    
+    @classmethod
+    def encoding_options(cls, options):
+        """出力ファイルの内容に影響するエンコードの設定（マニフェストのキーに使う）"""
+        return {
+            'png_profile': options.get('png_profile', cls.DEFAULT_PNG_PROFILE),
+            'ico_bmp': bool(options.get('ico_bmp')),
+        }
+    
+    @classmethod
+    def target_outputs(cls, target):
+        """プラットフォームごとの最終的な出力ファイル {相対パス: (形式, サイズのタプル)}"""
+        def png_files(folder, sizes):
+            return {
+                f"{folder}/icon_{size}x{size}.png": ('png', (size,)) for size in sizes
+            }
+        
+        if target == 'windows':
+            return {'app_icon.ico': ('ico', tuple(cls.WINDOWS_SIZES))}
+        if target == 'macos':
+            return {'AppIcon.icns': ('icns', tuple(sorted({size for _, size in cls.ICNS_TYPES})))}
+        if target == 'png_set':
+            return png_files('png_icons', cls.PNG_SIZES)
+        if target == 'favicon':
+            return {'favicon.ico': ('ico', tuple(cls.FAVICON_SIZES))}
+        raise ValueError(f"不明なプラットフォーム: {target}")
+    
+    @classmethod
+    def selected_outputs(cls, options):
+        """options で選択されたプラットフォームの出力ファイル"""
+        outputs = {}
+        for target in ('windows', 'macos', 'png_set', 'favicon'):
+            if options.get(target):
+                outputs.update(cls.target_outputs(target))
+        return outputs
+    
+    def relative_path(self, path):
+        """output_path からの相対パス（区切りは常に '/'）"""
+        return os.path.relpath(path, self.output_path).replace(os.sep, '/')
+    
+    def wanted(self, path):
+        """path（絶対パス）を書き出すかどうか"""
+        return self.outputs is None or self.relative_path(path) in self.outputs
+    
+    @classmethod
+    def init_file_mode(cls, mode=None):
+        """FILE_MODE を決める（mode を省くと現在の umask から求める）
+        
+        一括処理のワーカープロセスには、親プロセスで決めた値を渡す。
+        """
+        cls.FILE_MODE = 0o666 & ~current_umask() if mode is None else mode
+    
+    @staticmethod
+    def write_file(path, data):
+        """一時ファイルに書いてから置き換える（途中で止まっても壊れたファイルを残さない）
+        
+        mkstemp は 0600 でファイルを作るので、置き換える前に既存のファイルの
+        権限（なければ FILE_MODE）にそろえる。
+        """
+        import tempfile
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except OSError:
+            if IconExporter.FILE_MODE is None:
+                IconExporter.init_file_mode()
+            mode = IconExporter.FILE_MODE
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or '.', prefix='.', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+    
+    def icon_sizes(self, sizes):
+        """ICOに格納するサイズ（元画像より大きいサイズは除く）"""
+        limit = min(self.source_image.size)
+        return [size for size in sizes if size <= limit] or [min(sizes)]
+    
+    @staticmethod
+    def save_png(image, params):
+        """画像を params でPNGのバイト列にする"""
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', **params)
+        return buffer.getvalue()
+    
+    def encode_png(self, image):
+        """画像を選択されたプロファイルでPNGのバイト列にする（候補のうち最小のもの）"""
+        trials = self.PNG_PROFILES[self.png_profile]
+        if len(trials) == 1:
+            return self.save_png(image, trials[0])
+        encode = functools.partial(self.save_png, image)
+        if self.trial_executor is None:
+            return min(map(encode, trials), key=len)
+        # zlibはGILを解放するので、候補ごとのエンコードが並列に進む
+        return min(self.trial_executor.map(encode, trials), key=len)
+    
+    @staticmethod
+    def encode_bmp_entry(image):
+        """ICOのBMP要素（BITMAPINFOHEADER + 下から上へのBGRA + ANDマスク）
+        
+        高さはXORとANDの2枚分を書く。ANDマスクは完全に透明な画素を1にした
+        1bitの行を4バイト境界にそろえたもので、アルファを使わない表示系向け。
+        """
+        import struct
+        image = image.convert('RGBA')
+        width, height = image.size
+        pixels = image.tobytes('raw', 'BGRA', 0, -1)
+        
+        transparent = image.getchannel('A').point(lambda a: 255 if a == 0 else 0).convert('1')
+        row_bytes = (width + 7) // 8
+        padding = b'\0' * (-row_bytes % 4)
+        mask = transparent.tobytes('raw', '1', 0, -1)
+        mask = b''.join(
+            mask[y:y + row_bytes] + padding for y in range(0, len(mask), row_bytes)
+        )
+        
+        header = struct.pack(
+            '<IiiHHIIiiII', 40, width, height * 2, 1, 32, 0, len(pixels) + len(mask), 0, 0, 0, 0
+        )
+        return header + pixels + mask
+    
+    @staticmethod
+    def build_ico(payloads):
+        """サイズごとの要素（{一辺: バイト列}）からICOファイルの内容を組み立てる
+        
+        ICONDIR、各要素のICONDIRENTRY、要素の順に並べる。256px は幅・高さを0と書く。
+        """
+        import struct
+        sizes = sorted(payloads)
+        offset = 6 + 16 * len(sizes)
+        chunks = [struct.pack('<HHH', 0, 1, len(sizes))]
+        for size in sizes:
+            data = payloads[size]
+            chunks.append(struct.pack(
+                '<BBBBHHII', size % 256, size % 256, 0, 0, 1, 32, len(data), offset
+            ))
+            offset += len(data)
+        chunks += [payloads[size] for size in sizes]
+        return b''.join(chunks)
+    
+    def write_png(self, output_file, size):
+        """縮小 → PNGエンコード → 書き込み"""
+        image = self.pyramid.get(size)
+        start = time.perf_counter()
+        data = self.encode_png(image)
+        self.report[self.relative_path(output_file)] = (len(data), time.perf_counter() - start)
+        self.write_file(output_file, data)
+    
+    # ------------------------------------------------------------------
+    # タスクグラフ
+    #   タスクは {キー: (関数, 依存するキーのタプル)}。キーの先頭要素は
+    #   TASK_LABELS のいずれかで、進捗表示に使う。
+    # ------------------------------------------------------------------
+    
+    TASK_LABELS = {
+        'resize': '縮小画像',
+        'letterbox': '縮小画像（ICO）',
+        'windows': 'Windows用アイコン',
+        'macos': 'macOS用アイコン',
+        'png_set': 'PNGセット',
+        'favicon': 'Favicon'
+    }
+    
+    def ico_resize_label(self):
+        """ICOのフレームを作るタスクのキーの先頭要素"""
+        return 'resize' if self.ico_pyramid is self.pyramid else 'letterbox'
+    
+    def resize_tasks(self):
+        """ピラミッドの各段を作るタスク（縮小元の段に依存）"""
+        tasks = {}
+        pyramids = {'resize': self.pyramid, self.ico_resize_label(): self.ico_pyramid}
+        for label, pyramid in pyramids.items():
+            for size in pyramid.sizes:
+                parent = pyramid.parent_size(size)
+                deps = ((label, parent),) if parent else ()
+                tasks[(label, size)] = (functools.partial(pyramid.get, size), deps)
+        return tasks
+    
+    def png_tasks(self, target, files):
+        """PNGを1枚ずつ書き出すタスク（files は (パス, サイズ) の並び）"""
+        return {
+            (target, path): (
+                functools.partial(self.write_png, path, size),
+                (('resize', size),)
+            )
+            for path, size in files
+            if self.wanted(path)
+        }
+    
+    def container_tasks(self, target, output_file, sizes, encode, build, resize='resize'):
+        """各サイズの要素を並列にエンコードし、そろってから1つのファイルに書き出すタスク
+        
+        encode(サイズ) は要素のバイト列を、build({サイズ: バイト列}) はファイル全体を返す。
+        resize は要素が使う段を作るタスクのキーの先頭要素。
+        """
+        if not self.wanted(output_file):
+            return {}
+        payloads = {}
+        elapsed = {}
+        
+        def run(size):
+            start = time.perf_counter()
+            payloads[size] = encode(size)
+            elapsed[size] = time.perf_counter() - start
+        
+        def write():
+            data = build(payloads)
+            self.report[self.relative_path(output_file)] = (len(data), sum(elapsed.values()))
+            self.write_file(output_file, data)
+        
+        name = os.path.basename(output_file)
+        tasks = {
+            (target, f"{name} {size}px"): (
+                functools.partial(run, size),
+                ((resize, size),)
+            )
+            for size in sizes
+        }
+        tasks[(target, output_file)] = (write, tuple(tasks))
+        return tasks
+    
+    def icns_tasks(self, target, output_file):
+        """各サイズのPNGを並列にエンコードし、そろってからICNSを書き出すタスク"""
+        return self.container_tasks(
+            target, output_file, sorted({size for _, size in self.ICNS_TYPES}),
+            lambda size: self.encode_png(self.pyramid.get(size)),
+            self.build_icns
+        )
+    
+    @classmethod
+    def build_icns(cls, payloads):
+        """サイズごとのPNG（{一辺: バイト列}）からICNSファイルの内容を組み立てる
+        
+        'icns' ヘッダ、目次（'TOC '）、各要素の順に並べる。長さはすべてビッグエンディアン。
+        """
+        import struct
+        entries = [(ostype, payloads[size]) for ostype, size in cls.ICNS_TYPES]
+        toc = b''.join(ostype + struct.pack('>I', 8 + len(data)) for ostype, data in entries)
+        chunks = [b'TOC ', struct.pack('>I', 8 + len(toc)), toc]
+        for ostype, data in entries:
+            chunks += [ostype, struct.pack('>I', 8 + len(data)), data]
+        body = b''.join(chunks)
+        return b'icns' + struct.pack('>I', 8 + len(body)) + body
+    
+    def ico_tasks(self, target, output_file, sizes):
+        """各フレームをPNGまたはBMPの要素に並列にエンコードし、そろってからICOを書き出すタスク"""
+        png_min_size = self.ICO_PNG_MIN_SIZE[target] if self.ico_bmp else 0
+        
+        def encode(size):
+            frame = self.ico_pyramid.get(size)
+            if size >= png_min_size:
+                return self.encode_png(frame)
+            return self.encode_bmp_entry(frame)
+        
+        return self.container_tasks(
+            target, output_file, self.icon_sizes(sizes), encode, self.build_ico,
+            self.ico_resize_label()
+        )
+    
+    def target_tasks(self, target):
+        """プラットフォームごとの書き出しタスク"""
+        if target == 'windows':
+            output_file = os.path.join(self.output_path, "app_icon.ico")
+            return self.ico_tasks(target, output_file, self.WINDOWS_SIZES)
+        
+        if target == 'macos':
+            output_file = os.path.join(self.output_path, "AppIcon.icns")
+            return self.icns_tasks(target, output_file)
+        
+        if target == 'png_set':
+            output_dir = os.path.join(self.output_path, "png_icons")
+            os.makedirs(output_dir, exist_ok=True)
+            return self.png_tasks(target, [
+                (os.path.join(output_dir, f"icon_{size}x{size}.png"), size)
+                for size in self.PNG_SIZES
+            ])
+        
+        if target == 'favicon':
+            output_file = os.path.join(self.output_path, "favicon.ico")
+            return self.ico_tasks(target, output_file, self.FAVICON_SIZES)
+        
+        raise ValueError(f"不明なプラットフォーム: {target}")
+    
+    def build_tasks(self, targets=None):
+        """選択されたプラットフォームのタスクグラフを作成"""
+        if targets is None:
+            targets = [t for t in ('windows', 'macos', 'png_set', 'favicon') if self.options.get(t)]
+        
+        tasks = {}
+        for target in targets:
+            tasks.update(self.target_tasks(target))
+        
+        # 書き出すファイルが使う段（とその縮小元）だけを縮小する
+        resize = self.resize_tasks()
+        needed = [dep for _, deps in tasks.values() for dep in deps]
+        while needed:
+            key = needed.pop()
+            if key in resize and key not in tasks:
+                tasks[key] = resize[key]
+                needed.extend(resize[key][1])
+        return tasks
+    
+    def run_tasks(self, tasks):
+        """依存関係を守ってタスクをスレッドプールで実行し、完了したキーを順に返す
+        
+        PILの縮小やzlibはGILを解放するため、サイズごとの処理が並列に進む。
+        各ファイルの内容は実行順に依存しないので、出力は常に同じになる。
+        """
+        pending = dict(tasks)
+        completed = set()
+        running = {}
+        frame = RenderTracer.current_frame()
+        
+        with contextlib.ExitStack() as stack:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=self.max_workers))
+            if len(self.PNG_PROFILES[self.png_profile]) > 1:
+                # タスクのワーカーが候補の完了を待つので、候補は別のプールで実行する
+                # （同じプールに入れると、待つワーカーだけで埋まって進まなくなる）
+                self.trial_executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=self.max_workers))
+                stack.callback(setattr, self, 'trial_executor', None)
+            while pending or running:
+                ready = [
+                    key for key, (_, deps) in pending.items()
+                    if all(dep in completed or dep not in tasks for dep in deps)
+                ]
+                for key in ready:
+                    func, _ = pending.pop(key)
+                    running[executor.submit(self.run_task, key, func, frame)] = key
+                
+                if not running:
+                    raise RuntimeError("タスクの依存関係が循環しています")
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key = running.pop(future)
+                    future.result()
+                    completed.add(key)
+                    yield key
+    
+    def run_task(self, key, func, frame=None):
+        """タスクを1つ実行（呼び出し元のフレームに区間として記録）"""
+        label = self.TASK_LABELS.get(key[0], key[0])
+        name = f"{label} {os.path.basename(str(key[1]))}"
+        with RenderTracer.attach(frame), RenderTracer.span(name, 'export'):
+            return func()
+    
+    def export(self, progress=None, status=None):
+        """選択されたプラットフォーム向けにアイコンを書き出す"""
+        progress = progress or (lambda value: None)
+        status = status or (lambda message: None)
+        
+        status("アイコン生成を開始しています...")
+        progress(0)
+        
+        tasks = self.build_tasks()
+        total = len(tasks)
+        for done, key in enumerate(self.run_tasks(tasks), start=1):
+            status(f"{self.TASK_LABELS[key[0]]}を生成中... ({done}/{total})")
+            progress(done * 100 // total)
+        
+        progress(100)
+    
+    @classmethod
+    def render_and_export(cls, image, output_path, options, recipe=None, render=None,
+                          incremental=False, disk_cache=None, max_workers=None,
+                          progress=None, status=None, report=None):
+        """image に render（画像 → 画像）を適用した結果を output_path に書き出す
+        
+        recipe は render の条件を表すJSONにできる値で、ディスクキャッシュと
+        差分エクスポートのキーになる。disk_cache があればレンダリング結果と
+        縮小画像をそこから読み書きする。incremental なら入力が変わっていない
+        出力は縮小もエンコードもせず、すべて最新なら render も行わない。
+        report があれば書き出したファイルごとに report(相対パス, バイト数, エンコード時間[秒])
+        を呼ぶ。(書き出したファイル数, 変更がなかったファイル数) を返す。
+        """
+        outputs = cls.selected_outputs(options)
+        if disk_cache is not None and not disk_cache.enabled:
+            disk_cache = None
+        # キーは画像全体のハッシュなので、差分エクスポートかディスクキャッシュで使うときだけ求める
+        key = DiskRenderCache.key(image, recipe) if incremental or disk_cache else None
+        stale = outputs
+        if incremental:
+            manifest = ExportManifest(output_path)
+            stale = manifest.stale_outputs(outputs, key, cls.encoding_options(options))
+            if not stale:
+                return 0, len(outputs)
+        
+        rendered = image
+        if render is not None:
+            rendered = disk_cache.get(key) if disk_cache else None
+            if rendered is None:
+                rendered = render(image)
+                if disk_cache:
+                    disk_cache.put(key, rendered)
+        
+        exporter = cls(
+            rendered, output_path, options, max_workers,
+            outputs=set(stale) if incremental else None,
+            disk_cache=disk_cache, cache_key=key
+        )
+        exporter.export(progress, status)
+        if report:
+            for relative, (size, seconds) in sorted(exporter.report.items()):
+                report(relative, size, seconds)
+        if incremental:
+            manifest.record(stale)
+            manifest.save()
+        return len(stale), len(outputs) - len(stale)
+    
+    def create_windows_icon(self):
+        """Windows用アイコン生成"""
+        self.run_target('windows')
+    
+    def create_mac_icon(self):
+        """macOS用アイコン生成"""
+        self.run_target('macos')
+    
+    def create_png_set(self):
+        """PNGセット生成"""
+        self.run_target('png_set')
+    
+    def create_favicon(self):
+        """Favicon生成"""
+        self.run_target('favicon')
+    
+    def run_target(self, target):
+        """1つのプラットフォームだけを書き出す"""
+        for _ in self.run_tasks(self.build_tasks([target])):
+            pass
+
+
+def format_export_report(entries):
+    """(相対パス, バイト数, エンコード時間[秒]) の並びを、合計の行を付けた表にする"""
+    rows = list(entries)
+    rows.append(('合計', sum(size for _, size, _ in rows), sum(seconds for _, _, seconds in rows)))
+    width = max(len(relative) for relative, _, _ in rows)
+    return '\n'.join(
+        f"{relative:<{width}}  {size:>12,} B  {seconds * 1000:9.1f} ms"
+        for relative, size, seconds in rows
+    )
+
+
+class ExportManifest:
+    """差分エクスポート用のマニフェスト（出力フォルダ内のJSON）
+    
+    出力ファイルごとに、入力（ソース画像のピクセルとレンダリング条件）と
+    出力の形式・サイズ・エンコードの設定から求めたキー、書き出したファイルのダイジェストを記録する。
+    キーが同じでファイルの内容も記録どおりなら、その出力は書き出し直さない。
+    """
+    
+    FILE_NAME = '.icon_manifest.json'
+    # 出力の作り方を変えたときに上げる（古いマニフェストの記録をすべて無効にする）
+    VERSION = 3
+    
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILE_NAME)
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.entries = data.get('outputs', {})
+        except (OSError, ValueError, AttributeError):
+            # 無い・壊れているマニフェストは空として扱う
+            pass
+    
+    @staticmethod
+    def digest(data):
+        import hashlib
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    @classmethod
+    def output_key(cls, input_digest, spec, encoding):
+        """(入力のダイジェスト, 形式, サイズ, エンコードの設定) から出力ファイルのキーを求める"""
+        file_format, sizes = spec
+        return cls.digest(json.dumps(
+            [cls.VERSION, input_digest, file_format, list(sizes), encoding], sort_keys=True
+        ).encode())
+    
+    def file_digest(self, relative):
+        try:
+            with open(os.path.join(self.folder, relative), 'rb') as f:
+                return self.digest(f.read())
+        except OSError:
+            return None
+    
+    def stale_outputs(self, outputs, input_digest, encoding):
+        """outputs（{相対パス: (形式, サイズ)}）のうち書き出しが必要なもの {相対パス: キー}
+        
+        encoding は IconExporter.encoding_options() の値。
+        """
+        stale = {}
+        for relative, spec in outputs.items():
+            key = self.output_key(input_digest, spec, encoding)
+            entry = self.entries.get(relative)
+            if not entry or entry.get('key') != key or self.file_digest(relative) != entry.get('digest'):
+                stale[relative] = key
+        return stale
+    
+    def record(self, written):
+        """書き出したファイル（{相対パス: キー}）を記録する"""
+        for relative, key in written.items():
+            self.entries[relative] = {'key': key, 'digest': self.file_digest(relative)}
+    
+    def save(self):
+        data = {'version': self.VERSION, 'outputs': self.entries}
+        IconExporter.write_file(
+            self.path,
+            json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+        )
 
 
 class IconGeneratorThread(QThread):
@@ -24,178 +920,922 @@ class IconGeneratorThread(QThread):
     finished_signal = Signal(str)
     error = Signal(str)
     
-    def __init__(self, source_image, output_path, options):
+    def __init__(self, source_image, output_path, options, render_params=None, incremental=False):
         super().__init__()
         self.source_image = source_image
         self.output_path = output_path
         self.options = options
+        self.render_params = render_params
+        self.incremental = incremental
+        # 書き出したファイルごとの (相対パス, バイト数, エンコード時間[秒])
+        self.report = []
     
     def run(self):
+        with RenderTracer.frame('export'):
+            RenderTracer.profiled(self.generate)
+    
+    def generate(self):
         try:
-            self.status.emit("アイコン生成を開始しています...")
-            self.progress.emit(10)
-            
-            # Windows ICO
-            if self.options.get('windows'):
-                self.status.emit("Windows用アイコンを生成中...")
-                self.create_windows_icon()
-                self.progress.emit(40)
-            
-            # macOS ICNS
-            if self.options.get('macos'):
-                self.status.emit("macOS用アイコンを生成中...")
-                self.create_mac_icon()
-                self.progress.emit(60)
-            
-            # PNG セット
-            if self.options.get('png_set'):
-                self.status.emit("PNGセットを生成中...")
-                self.create_png_set()
-                self.progress.emit(80)
-            
-            # Favicon
-            if self.options.get('favicon'):
-                self.status.emit("Faviconを生成中...")
-                self.create_favicon()
-                self.progress.emit(90)
-            
-            self.progress.emit(100)
-            self.finished_signal.emit("アイコンの生成が完了しました！")
+            # プレビューはプロキシで描画しているため、ここでフル解像度を描画する
+            written, unchanged = IconExporter.render_and_export(
+                self.source_image,
+                self.output_path,
+                self.options,
+                recipe=self.render_params,
+                render=self.render if self.render_params is not None else None,
+                incremental=self.incremental,
+                disk_cache=DiskRenderCache.default(),
+                progress=self.progress.emit,
+                status=self.status.emit,
+                report=lambda *entry: self.report.append(entry)
+            )
+            if self.incremental:
+                self.finished_signal.emit(
+                    f"アイコンを更新しました（書き出し {written} / 変更なし {unchanged} ファイル）"
+                )
+            else:
+                self.finished_signal.emit("アイコンの生成が完了しました！")
             
         except Exception as e:
             self.error.emit(f"エラーが発生しました: {str(e)}")
     
-    def create_windows_icon(self):
-        """Windows用アイコン生成"""
-        sizes = [16, 24, 32, 48, 64, 128, 256]
-        icon_sizes = [(size, size) for size in sizes]
-        
-        output_file = os.path.join(self.output_path, "app_icon.ico")
-        self.source_image.save(output_file, format='ICO', sizes=icon_sizes)
+    def render(self, image):
+        self.status.emit("フル解像度でレンダリング中...")
+        return RenderPipeline.render(image, self.render_params)
+
+
+class SourceDecoder:
+    """ソース画像を書き出しに必要な解像度だけデコードする（GUI非依存）
     
-    def create_mac_icon(self):
-        """macOS用アイコン生成"""
-        sizes = [16, 32, 64, 128, 256, 512, 1024]
-        output_dir = os.path.join(self.output_path, "macos_icons")
-        os.makedirs(output_dir, exist_ok=True)
+    JPEG は draft() でDCTの段階から1/2〜1/8に、JPEG 2000 は reduce で
+    解像度レベルを落としてデコードするため、元の解像度の画像を作らずに済む。
+    その他の形式は全体をデコードしてから整数倍で縮小する。どの場合も
+    短辺が要求された大きさを下回るほどには縮小しない。
+    
+    PNGなどは元の解像度で一度デコードされるため、その間のピーク
+    （幅×高さ×4バイト）は避けられない。Pillowのデコーダーは画像の最後で
+    圧縮ストリームを閉じるので、帯ごとに分けてデコードすることもできない。
+    """
+    
+    REDUCIBLE_FORMATS = ('JPEG', 'JPEG2000')
+    
+    @staticmethod
+    def working_size():
+        """書き出しに必要な短辺（最大の出力サイズの2倍）
         
-        if platform.system() == 'Darwin':
-            # macOSの場合、iconsetを作成
-            iconset_path = os.path.join(self.output_path, "AppIcon.iconset")
-            os.makedirs(iconset_path, exist_ok=True)
-            
-            for size in sizes:
-                img = self.source_image.resize((size, size), Image.Resampling.LANCZOS)
-                img.save(f"{iconset_path}/icon_{size}x{size}.png")
-                
-                if size <= 512:
-                    retina_size = size * 2
-                    img_2x = self.source_image.resize(
-                        (retina_size, retina_size),
-                        Image.Resampling.LANCZOS
-                    )
-                    img_2x.save(f"{iconset_path}/icon_{size}x{size}@2x.png")
+        最後の縮小を常に2倍以上の画像から LANCZOS で行えるようにする。
+        選んだプラットフォームによらず同じなので、書き出す画像も選択で変わらない。
+        """
+        return 2 * max(IconExporter.PYRAMID_SIZES)
+    
+    @classmethod
+    def can_reduce(cls, image):
+        """デコード時に縮小できる形式か"""
+        return image.format in cls.REDUCIBLE_FORMATS
+    
+    @staticmethod
+    def reduction(size, min_side):
+        """短辺が min_side を下回らない最大の整数縮小率"""
+        return max(1, min(size) // max(1, min_side))
+    
+    @classmethod
+    def decode(cls, file_path, min_side):
+        """短辺が min_side 以上になる解像度でデコードしたRGBA画像と、元画像に対する倍率"""
+        image = Image.open(file_path)
+        original_width = image.width
+        factor = cls.reduction(image.size, min_side)
+        if factor > 1:
+            if image.format == 'JPEG':
+                image.draft(None, (min_side, min_side))
+            elif image.format == 'JPEG2000':
+                # 解像度レベル1つごとに半分になる
+                image.reduce = factor.bit_length() - 1
+        image.load()
+        
+        # デコード時に縮小しきれなかった分は整数倍で縮小する
+        factor = cls.reduction(image.size, min_side)
+        if factor > 1:
+            image = Image.Image.reduce(image, factor)
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        return image, image.width / original_width
+
+
+class SourceLoadThread(QThread):
+    """ソース画像をバックグラウンドでデコードするスレッド
+    
+    デコード時に縮小できる形式では、まずプレビュー用の小さな画像を、
+    続けて書き出しに必要な解像度の画像を通知する。
+    """
+    decoded = Signal(int, object, float, bool)  # 世代, 画像, 倍率, 最終段か
+    error = Signal(int, str)
+    
+    def __init__(self, generation, file_path, preview_side, working_side, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.file_path = file_path
+        self.preview_side = preview_side
+        self.working_side = working_side
+        self.image = None
+        self.scale = 1.0
+    
+    def run(self):
+        try:
+            with Image.open(self.file_path) as image:
+                size = image.size
+                early = SourceDecoder.can_reduce(image) and (
+                    SourceDecoder.reduction(size, self.preview_side)
+                    > SourceDecoder.reduction(size, self.working_side)
+                )
+            if early:
+                preview, scale = SourceDecoder.decode(self.file_path, self.preview_side)
+                self.decoded.emit(self.generation, preview, scale, False)
             
-            # iconutilで変換
-            os.system(f"iconutil -c icns {iconset_path}")
+            self.image, self.scale = SourceDecoder.decode(self.file_path, self.working_side)
+            self.decoded.emit(self.generation, self.image, self.scale, True)
+        except Exception as e:
+            self.error.emit(self.generation, str(e))
+
+
+def image_digest(image, recipe=None, rows=256):
+    """画像のピクセルと条件（JSONにできる値）のダイジェスト
+    
+    全体のバイト列を一度に作らないよう、rows 行ごとの帯でハッシュする。
+    """
+    import hashlib
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps(
+        [image.mode, image.size, recipe], sort_keys=True, ensure_ascii=False
+    ).encode('utf-8'))
+    for top in range(0, image.height, rows):
+        hasher.update(image.crop((0, top, image.width, min(image.height, top + rows))).tobytes())
+    return hasher.hexdigest()
+
+
+def image_nbytes(value):
+    """画像（またはそれを含むタプル）のおおよそのメモリ使用量"""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (tuple, list)):
+        return sum(image_nbytes(item) for item in value)
+    return 0
+
+
+class RenderCache:
+    """件数とバイト数で上限を設けたLRUキャッシュ（ヒット/ミス数を記録）"""
+    
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024, sizeof=image_nbytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """値を取得（見つからなければ default）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value):
+        """値を格納し、上限を超えた分を古い順に捨てる"""
+        nbytes = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._nbytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+    
+    def get_or_compute(self, key, compute):
+        """キャッシュにあれば返し、なければ計算して格納"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        """すべてのエントリと統計を破棄"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """ヒット/ミス数と使用量"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._nbytes
+            }
+
+
+class DiskRenderCache:
+    """プロセスをまたいで共有するレンダリング結果のディスクキャッシュ
+    
+    キーは ソース画像のピクセルとレンダリング条件（パラメータまたはプリセット名）の
+    ダイジェストで、フルサイズの結果とアイコン用の各サイズの縮小画像を保存する。
+    ファイルは一時ファイルに書いてから置き換えるので、複数のプロセスが同時に
+    読み書きしても壊れたファイルは見えない。合計サイズが上限を超えたら、
+    最後に使った時刻（mtime）の古いものから削除する。
+    """
+    
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+    MAGIC = b'ICONRC1\n'
+    SUFFIX = '.rc'
+    LOCK_NAME = '.evict.lock'
+    # これより古いロックファイルは異常終了したプロセスの残りとみなす
+    LOCK_TIMEOUT = 60
+    # レンダリングや縮小の結果が変わる変更をしたときに上げる（古い結果をすべて無効にする）
+    VERSION = 4
+    # 合計サイズは最初に一度数え、以後は書いた分を足して見積もる。
+    # 他のプロセスが書いた分を取り込むため、この回数書くごとに数え直す
+    RESCAN_WRITES = 64
+    
+    _default = None
+    _default_lock = threading.Lock()
+    _shared = {}
+    
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        # root が None なら何も保存しない（常に計算する）
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total = None
+        self._writes = 0
+        self._evict_lock = threading.Lock()
+    
+    @staticmethod
+    def default_root():
+        """ICON_RENDER_CACHE（'off' で無効）か、ユーザーのキャッシュフォルダ"""
+        root = os.environ.get('ICON_RENDER_CACHE')
+        if root is not None:
+            return None if root.lower() in ('', '0', 'off') else root
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache')
+        return os.path.join(base, 'icon_generator', 'renders')
+    
+    @classmethod
+    def default(cls):
+        """プロセス内で共有する既定のキャッシュ"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(cls.default_root())
+            return cls._default
+    
+    @classmethod
+    def shared(cls, root):
+        """プロセス内で root ごとに共有するキャッシュ
+        
+        使うたびに作り直すと合計サイズの見積もりが空から始まり、最初の書き込みで
+        フォルダ全体を走査し直すので、一括処理のワーカーはこれを使い回す。
+        """
+        with cls._default_lock:
+            cache = cls._shared.get(root)
+            if cache is None:
+                cache = cls._shared[root] = cls(root)
+            return cache
+    
+    @property
+    def enabled(self):
+        return self.root is not None
+    
+    @classmethod
+    def key(cls, image, recipe=None):
+        """image と recipe（レンダリング条件）のキャッシュキー"""
+        return image_digest(image, [cls.VERSION, recipe])
+    
+    def path(self, key, name='full'):
+        return os.path.join(self.root, key[:2], f"{key}-{name}{self.SUFFIX}")
+    
+    def get(self, key, name='full'):
+        """保存された画像（無ければ None）"""
+        if not self.enabled:
+            return None
+        path = self.path(key, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # 最後に使った時刻を更新（LRUの順序に使う）
+            os.utime(path)
+            image = self.decode(data)
+        except (OSError, ValueError):
+            # 無い・別のプロセスに削除された・壊れているファイルは計算し直す
+            self.misses += 1
+            return None
+        self.hits += 1
+        return image
+    
+    def put(self, key, image, name='full'):
+        if not self.enabled:
+            return
+        path = self.path(key, name)
+        data = self.encode(image)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            IconExporter.write_file(path, data)
+        except OSError:
+            # キャッシュに書けなくても処理は続ける
+            return
+        self.evict(len(data))
+    
+    def render(self, image, recipe, compute):
+        """(キー, 結果) を返す。保存済みならファイルから読み、無ければ compute() の結果を保存する"""
+        key = self.key(image, recipe)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return key, result
+    
+    @classmethod
+    def encode(cls, image):
+        """ヘッダ（モード・サイズ・帯ごとの長さ）と HistoryStore の圧縮帯を並べたバイト列"""
+        mode, size, chunks = HistoryStore.encode(image)
+        header = json.dumps({'mode': mode, 'size': size, 'chunks': [len(c) for c in chunks]})
+        return b''.join((cls.MAGIC, header.encode('ascii'), b'\n') + chunks)
+    
+    @classmethod
+    def decode(cls, data):
+        if not data.startswith(cls.MAGIC):
+            raise ValueError("キャッシュファイルの形式が違います")
+        end = data.index(b'\n', len(cls.MAGIC))
+        header = json.loads(data[len(cls.MAGIC):end])
+        view = memoryview(data)
+        chunks = []
+        offset = end + 1
+        for length in header['chunks']:
+            chunks.append(view[offset:offset + length])
+            offset += length
+        if offset != len(data):
+            raise ValueError("キャッシュファイルが壊れています")
+        return HistoryStore.decode((header['mode'], tuple(header['size']), chunks))
+    
+    def entries(self):
+        """[(mtime, バイト数, パス)]"""
+        result = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.SUFFIX):
+                    with contextlib.suppress(OSError):
+                        stat = entry.stat()
+                        result.append((stat.st_mtime, stat.st_size, entry.path))
+        return result
+    
+    @contextlib.contextmanager
+    def eviction_lock(self):
+        """削除を1つのプロセスだけが行うためのロックファイル（取れなければ False）"""
+        lock_path = os.path.join(self.root, self.LOCK_NAME)
+        try:
+            if time.time() - os.path.getmtime(lock_path) > self.LOCK_TIMEOUT:
+                os.remove(lock_path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            yield False
+            return
+        try:
+            os.close(fd)
+            yield True
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(lock_path)
+    
+    def evict(self, written=0):
+        """合計サイズが上限を超えていたら、古いものから削除する
+        
+        written は直前に書いたバイト数。見積もりが上限以下で数え直す時期でもなければ、
+        フォルダを走査しない。
+        """
+        with self._evict_lock:
+            self._writes += 1
+            if self._total is not None and self._writes < self.RESCAN_WRITES:
+                self._total += written
+                if self._total <= self.max_bytes:
+                    return
             
-            # 一時ディレクトリを削除
-            import shutil
-            shutil.rmtree(iconset_path)
+            entries = self.entries()
+            self._total = sum(size for _, size, _ in entries)
+            self._writes = 0
+            if self._total <= self.max_bytes:
+                return
+            with self.eviction_lock() as locked:
+                if not locked:
+                    # 別のプロセスが削除中
+                    return
+                for _, size, path in sorted(entries):
+                    if self._total <= self.max_bytes:
+                        break
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+                        self._total -= size
+    
+    def clear(self):
+        """保存したファイルをすべて削除"""
+        if not self.enabled or not os.path.isdir(self.root):
+            return
+        for _, _, path in self.entries():
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        with self._evict_lock:
+            self._total = None
+
+
+class HistoryStore:
+    """編集履歴（操作ログと定期的なキーフレーム）
+    
+    回転・反転・マスクなどの決定的な操作は関数だけを記録し、一定手数ごとに
+    圧縮したフル解像度のキーフレームを保存する。任意の状態は直前の
+    キーフレームから操作を再生して復元する。
+    """
+    
+    # 速度優先の圧縮レベル
+    COMPRESS_LEVEL = 1
+    
+    # 帯1本あたりの行数（帯ごとに独立して圧縮し、並列に処理する）
+    STRIP_ROWS = 256
+    
+    # この手数ごとにキーフレームを保存する
+    KEYFRAME_INTERVAL = 8
+    
+    # 展開・再生済みの状態を保持しておく数（直前の状態と最後に展開したキーフレーム）
+    DECODED_STATES = 2
+    
+    # zlibはGILを解放するので帯の圧縮・展開はスレッドで並列化できる
+    _executor = None
+    _executor_lock = threading.Lock()
+    
+    def __init__(self, max_entries=500, max_bytes=512 * 1024 * 1024,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.keyframe_interval = keyframe_interval
+        self.entries = []  # ('keyframe', スナップショット) または ('op', 画像を受け取る関数)
+        self.index = -1
+        self.nbytes = 0
+        self.head = None  # 現在位置の画像
+        self._decoded = []  # 復元済みの状態 [(エントリ, 画像)]（新しいものが後ろ）
+    
+    @classmethod
+    def executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1),
+                    thread_name_prefix='history'
+                )
+            return cls._executor
+    
+    @classmethod
+    def encode(cls, image):
+        """画像を圧縮スナップショットにする"""
+        width, height = image.size
+        
+        def compress_strip(top):
+            strip = image.crop((0, top, width, min(height, top + cls.STRIP_ROWS)))
+            return zlib.compress(strip.tobytes(), cls.COMPRESS_LEVEL)
+        
+        chunks = tuple(cls.executor().map(compress_strip, range(0, height, cls.STRIP_ROWS)))
+        return (image.mode, image.size, chunks)
+    
+    @classmethod
+    def decode(cls, snapshot):
+        """圧縮スナップショットを画像に戻す"""
+        mode, size, chunks = snapshot
+        return Image.frombytes(mode, size, b''.join(cls.executor().map(zlib.decompress, chunks)))
+    
+    @staticmethod
+    def entry_nbytes(entry):
+        kind, payload = entry
+        if kind != 'keyframe':
+            return 0
+        return sum(len(chunk) for chunk in payload[2])
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def keyframe_count(self):
+        return sum(1 for kind, _ in self.entries if kind == 'keyframe')
+    
+    def keyframe_before(self, index):
+        """index 以前で最も近いキーフレームの位置"""
+        for i in range(index, -1, -1):
+            if self.entries[i][0] == 'keyframe':
+                return i
+        raise LookupError('履歴にキーフレームがありません')
+    
+    def clear(self):
+        self.entries = []
+        self.index = -1
+        self.nbytes = 0
+        self.head = None
+        self._decoded = []
+    
+    def reset(self, image):
+        """履歴を1枚の画像から始め直す"""
+        self.clear()
+        self.push(image)
+    
+    def _remove(self, start, stop):
+        removed = self.entries[start:stop]
+        del self.entries[start:stop]
+        self.nbytes -= sum(self.entry_nbytes(entry) for entry in removed)
+        self._decoded = [
+            (entry, image) for entry, image in self._decoded
+            if not any(entry is r for r in removed)
+        ]
+    
+    def _remember(self, index, image):
+        """index 番目の状態を復元済みとして保持"""
+        entry = self.entries[index]
+        self._decoded = [(e, im) for e, im in self._decoded if e is not entry]
+        self._decoded.append((entry, image))
+        del self._decoded[:-self.DECODED_STATES]
+    
+    def _cached_state(self, index):
+        if index == self.index and self.head is not None:
+            return self.head
+        for entry, image in self._decoded:
+            if entry is self.entries[index]:
+                return image
+        return None
+    
+    def _append(self, entry, image):
+        # 現在位置より先の履歴は破棄
+        self._remove(self.index + 1, len(self.entries))
+        self.entries.append(entry)
+        self.nbytes += self.entry_nbytes(entry)
+        self.index = len(self.entries) - 1
+        self.head = image
+        
+        # 上限を超えたら先頭のキーフレームとそれに続く操作をまとめて削除
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            next_keyframe = next(
+                (i for i in range(1, self.index + 1) if self.entries[i][0] == 'keyframe'),
+                None
+            )
+            if next_keyframe is None:
+                break
+            self._remove(0, next_keyframe)
+            self.index -= next_keyframe
+    
+    def push(self, image):
+        """キーフレームとして追加"""
+        self._append(('keyframe', self.encode(image)), image)
+    
+    def push_op(self, image, source, op):
+        """op(source) の結果 image を操作として追加
+        
+        入力が現在の状態でない場合や、前のキーフレームから一定手数を超えた
+        場合はキーフレームとして保存する。
+        """
+        if (source is not self.head or
+                self.index + 1 - self.keyframe_before(self.index) >= self.keyframe_interval):
+            self.push(image)
         else:
-            # macOS以外の場合、PNGセットとして保存
-            for size in sizes:
-                img = self.source_image.resize((size, size), Image.Resampling.LANCZOS)
-                img.save(os.path.join(output_dir, f"icon_{size}x{size}.png"))
+            # 直前の状態を残しておけば、直近のアンドゥは再生なしで済む
+            self._remember(self.index, source)
+            self._append(('op', op), image)
     
-    def create_png_set(self):
-        """PNGセット生成"""
-        sizes = [16, 32, 48, 64, 128, 256, 512, 1024]
-        output_dir = os.path.join(self.output_path, "png_icons")
-        os.makedirs(output_dir, exist_ok=True)
+    def state(self, index):
+        """index 番目の状態を復元"""
+        keyframe = self.keyframe_before(index)
+        # キーフレーム以降で最も近い復元済みの状態から再生する
+        for start in range(index, keyframe - 1, -1):
+            image = self._cached_state(start)
+            if image is not None:
+                break
+        else:
+            start, image = keyframe, self.decode(self.entries[keyframe][1])
+            self._remember(keyframe, image)
         
-        for size in sizes:
-            img = self.source_image.resize((size, size), Image.Resampling.LANCZOS)
-            img.save(os.path.join(output_dir, f"icon_{size}x{size}.png"))
+        for _, op in self.entries[start + 1:index + 1]:
+            image = op(image)
+        return image
     
-    def create_favicon(self):
-        """Favicon生成"""
-        sizes = [(16, 16), (32, 32), (48, 48)]
-        output_file = os.path.join(self.output_path, "favicon.ico")
-        self.source_image.save(output_file, format='ICO', sizes=sizes)
+    def can_undo(self):
+        return self.index > 0
+    
+    def can_redo(self):
+        return self.index < len(self.entries) - 1
+    
+    def undo(self):
+        """1つ前の画像を返す"""
+        if not self.can_undo():
+            return None
+        self.head = self.state(self.index - 1)
+        self.index -= 1
+        return self.head
+    
+    def redo(self):
+        """1つ後の画像を返す"""
+        if not self.can_redo():
+            return None
+        self.head = self.state(self.index + 1)
+        self.index += 1
+        return self.head
+    
+    def summary(self):
+        """ステータスバー表示用の文字列"""
+        return (
+            f'履歴: {self.index + 1}/{len(self.entries)} '
+            f'({self.nbytes / (1024 * 1024):.1f} MB, キーフレーム {self.keyframe_count()})'
+        )
 
 
 class AdvancedImageProcessor:
     """高度な画像処理機能"""
     
+    # 影レイヤー (アルファのハッシュ, サイズ, オフセット, 半径, 色) -> RGBA画像
+    shadow_cache = RenderCache(max_entries=8, max_bytes=256 * 1024 * 1024)
+    
+    # 縮小後のぼかし半径がこの程度になるまで縮小してからぼかす
+    SHADOW_WORKING_RADIUS = 4
+    
+    SHADOW_COLOR = (0, 0, 0, 180)
+    
+    @classmethod
+    def shadow_factor(cls, blur_radius):
+        """影をぼかす前に縮小する倍率"""
+        return max(1, int(blur_radius // cls.SHADOW_WORKING_RADIUS))
+    
     @staticmethod
-    def add_drop_shadow(image, offset=(8, 8), blur_radius=15, color=(0, 0, 0, 180)):
-        """ドロップシャドウを追加"""
-        # 影用の新しい画像を作成
-        shadow_size = (
-            image.width + abs(offset[0]) * 3,
-            image.height + abs(offset[1]) * 3
-        )
-        shadow = Image.new('RGBA', shadow_size, (0, 0, 0, 0))
+    def tint_mask(mask, color):
+        """各チャンネルが 色 × 形の濃さ のRGBA画像（透明の上に色をマスク付きで貼った場合と同じ）"""
+        rgba = tuple(color) + (255,) * (4 - len(color))
+        return Image.merge('RGBA', [
+            mask.point([c * v // 255 for v in range(256)]) for c in rgba
+        ])
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_shadow_layer(cls, image, offset=(8, 8), blur_radius=15, color=SHADOW_COLOR):
+        """ぼかした影だけのレイヤーを作成（同じ形・条件なら使い回す）"""
+        from PIL import ImageFilter
+        import hashlib
+        alpha = image.getchannel('A')
+        digest = hashlib.blake2b(alpha.tobytes(), digest_size=16).digest()
+        key = (digest, image.size, tuple(offset), blur_radius, tuple(color))
+        
+        def compute():
+            # 影の形（アルファ）だけを1チャンネルで描画
+            shadow_size = (
+                image.width + abs(offset[0]) * 3,
+                image.height + abs(offset[1]) * 3
+            )
+            mask = Image.new('L', shadow_size, 0)
+            shadow_offset = (abs(offset[0]) + offset[0], abs(offset[1]) + offset[1])
+            mask.paste(alpha, shadow_offset)
+            
+            # 柔らかい影は縮小してぼかしてから拡大しても見た目が変わらない
+            factor = cls.shadow_factor(blur_radius)
+            if factor == 1:
+                mask = mask.filter(ImageFilter.GaussianBlur(blur_radius))
+            else:
+                mask = mask.reduce(factor).filter(
+                    ImageFilter.GaussianBlur(blur_radius / factor)
+                ).resize(
+                    shadow_size,
+                    Image.Resampling.BICUBIC,
+                    box=(0, 0, shadow_size[0] / factor, shadow_size[1] / factor)
+                )
+            
+            return cls.tint_mask(mask, color)
         
-        # 影を描画
-        shadow_layer = Image.new('RGBA', image.size, color)
-        shadow_offset = (abs(offset[0]) + offset[0], abs(offset[1]) + offset[1])
-        shadow.paste(shadow_layer, shadow_offset, image)
-        shadow = shadow.filter(ImageFilter.GaussianBlur(blur_radius))
+        return cls.shadow_cache.get_or_compute(key, compute)
+    
+    @classmethod
+    @RenderTracer.traced
+    def add_drop_shadow(cls, image, offset=(8, 8), blur_radius=15, color=SHADOW_COLOR):
+        """ドロップシャドウを追加"""
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
         
-        # 元の画像を上に配置
-        final = Image.new('RGBA', shadow.size, (0, 0, 0, 0))
-        final.paste(shadow, (0, 0))
+        # 元の画像を影の上に配置
+        final = cls.create_shadow_layer(image, offset, blur_radius, color).copy()
         final.paste(image, (abs(offset[0]), abs(offset[1])), image)
         
         return final
     
+    # ------------------------------------------------------------------
+    # 形状マスク
+    # ------------------------------------------------------------------
+    
+    MASK_SHAPES = ('rounded_rect', 'circle', 'squircle')
+    
+    # スクワークル（超楕円 |x|^n + |y|^n = 1）の指数
+    SQUIRCLE_EXPONENT = 5
+    
+    # 1行あたりの縦方向サンプル数（横方向は面積を厳密に計算する）
+    MASK_SUBSAMPLES = 4
+    
+    # 生成済みのマスク (サイズ, 形状, 半径) -> 'L' 画像
+    mask_cache = RenderCache(max_entries=16, max_bytes=128 * 1024 * 1024)
+    
+    @classmethod
+    def _shape_half_width(cls, shape, width, height, radius, y):
+        """高さ y（連続座標）での形の左右半幅（形の外なら0）"""
+        a = width / 2
+        b = height / 2
+        dy = abs(y - b)
+        if dy >= b:
+            return 0.0
+        
+        if shape == 'circle':
+            return a * math.sqrt(1 - (dy / b) ** 2)
+        
+        if shape == 'squircle':
+            n = cls.SQUIRCLE_EXPONENT
+            return a * (1 - (dy / b) ** n) ** (1 / n)
+        
+        # 角丸長方形
+        r = min(radius, a, b)
+        straight = b - r
+        if dy <= straight:
+            return a
+        d = dy - straight
+        return a - r + math.sqrt(max(0.0, r * r - d * d))
+    
+    @classmethod
+    def _mask_row(cls, shape, width, height, radius, y):
+        """マスクの y 行目のバイト列（輪郭のピクセルは覆われた面積に応じた値）"""
+        samples = cls.MASK_SUBSAMPLES
+        center = width / 2
+        extents = [
+            cls._shape_half_width(shape, width, height, radius, y + (k + 0.5) / samples)
+            for k in range(samples)
+        ]
+        inner = min(extents)
+        outer = max(extents)
+        row = bytearray(width)
+        if outer <= 0:
+            return row
+        
+        def coverage(x):
+            covered = sum(
+                max(0.0, min(x + 1, center + e) - max(x, center - e)) for e in extents
+            )
+            return round(255 * covered / samples)
+        
+        start = max(0, math.floor(center - outer))
+        full_start = min(width, max(start, math.ceil(center - inner)))
+        full_end = max(full_start, min(width, math.floor(center + inner)))
+        end = min(width, math.ceil(center + outer))
+        
+        for x in range(start, full_start):
+            row[x] = coverage(x)
+        row[full_start:full_end] = b'\xff' * (full_end - full_start)
+        for x in range(full_end, end):
+            row[x] = coverage(x)
+        return row
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_shape_mask(cls, size, shape='rounded_rect', radius=0, box=None):
+        """アンチエイリアスのかかった形状マスク（'L' 画像）を作成
+        
+        box (left, top, right, bottom) を指定すると、その範囲だけを作成する。
+        """
+        if shape not in cls.MASK_SHAPES:
+            raise ValueError(f"不明なマスク形状: {shape}")
+        width, height = size
+        if box is not None:
+            left, top, right, bottom = box
+            rows = [
+                bytes(cls._mask_row(shape, width, height, radius, y)[left:right])
+                for y in range(top, bottom)
+            ]
+            return Image.frombytes('L', (right - left, bottom - top), b''.join(rows))
+        key = (tuple(size), shape, radius if shape == 'rounded_rect' else None)
+        
+        def compute():
+            # 上下対称なので上半分だけ計算して折り返す
+            top = [
+                bytes(cls._mask_row(shape, width, height, radius, y))
+                for y in range((height + 1) // 2)
+            ]
+            rows = top + top[:height // 2][::-1]
+            return Image.frombytes('L', size, b''.join(rows))
+        
+        return cls.mask_cache.get_or_compute(key, compute)
+    
     @staticmethod
-    def create_rounded_corners(image, radius=30):
-        """角を丸くする"""
-        # マスクを作成
-        mask = Image.new('L', image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.rounded_rectangle([(0, 0), image.size], radius, fill=255)
-        
-        # 結果画像を作成
-        result = Image.new('RGBA', image.size, (0, 0, 0, 0))
-        result.paste(image, (0, 0))
+    @RenderTracer.traced
+    def apply_mask(image, mask):
+        """マスクをアルファに掛け合わせる"""
+        from PIL import ImageChops
+        result = image.convert('RGBA') if image.mode != 'RGBA' else image.copy()
+        alpha = result.getchannel('A')
+        if alpha.getextrema() != (255, 255):
+            # 不透明ならマスクがそのままアルファになる
+            mask = ImageChops.multiply(alpha, mask)
         result.putalpha(mask)
-        
         return result
     
+    @classmethod
+    @RenderTracer.traced
+    def create_rounded_corners(cls, image, radius=30):
+        """角を丸くする"""
+        mask = cls.create_shape_mask(image.size, 'rounded_rect', radius)
+        return cls.apply_mask(image, mask)
+    
+    GRADIENT_DIRECTIONS = ('vertical', 'horizontal', 'radial', 'diagonal')
+    
+    # 計算済みのグラデーション面 (サイズ, 色, 方向) -> RGBA画像
+    gradient_cache = RenderCache(max_entries=16, max_bytes=128 * 1024 * 1024)
+    
     @staticmethod
-    def add_gradient_background(image, color1=(66, 133, 244), color2=(219, 68, 55), direction='vertical'):
-        """グラデーション背景を追加"""
-        gradient = Image.new('RGB', image.size, color1)
-        draw = ImageDraw.Draw(gradient)
-        
+    def _linear_ramp(length):
+        """0→255 に線形変化する長さ length の 'L' 帯（縦 1×length）"""
+        return Image.linear_gradient('L').crop((0, 0, 1, 256)).resize(
+            (1, length), Image.Resampling.BILINEAR
+        )
+    
+    @classmethod
+    def _gradient_plane(cls, size, direction, box=None):
+        """0→255 のグラデーション値を持つ 'L' 画像（box を指定するとその範囲だけ）"""
+        from PIL import ImageChops
+        width, height = size
+        left, top, right, bottom = box or (0, 0, width, height)
+        region = (right - left, bottom - top)
         if direction == 'vertical':
-            for i in range(image.height):
-                ratio = i / image.height
-                r = int(color1[0] + (color2[0] - color1[0]) * ratio)
-                g = int(color1[1] + (color2[1] - color1[1]) * ratio)
-                b = int(color1[2] + (color2[2] - color1[2]) * ratio)
-                draw.line([(0, i), (image.width, i)], fill=(r, g, b))
-        else:  # horizontal
-            for i in range(image.width):
-                ratio = i / image.width
-                r = int(color1[0] + (color2[0] - color1[0]) * ratio)
-                g = int(color1[1] + (color2[1] - color1[1]) * ratio)
-                b = int(color1[2] + (color2[2] - color1[2]) * ratio)
-                draw.line([(i, 0), (i, image.height)], fill=(r, g, b))
-        
-        # RGBA変換
-        gradient = gradient.convert('RGBA')
-        result = Image.new('RGBA', image.size)
-        result.paste(gradient, (0, 0))
+            return cls._linear_ramp(height).crop((0, top, 1, bottom)).resize(
+                region, Image.Resampling.NEAREST
+            )
+        if direction == 'horizontal':
+            return cls._linear_ramp(width).transpose(Image.Transpose.TRANSPOSE).crop(
+                (left, 0, right, 1)
+            ).resize(region, Image.Resampling.NEAREST)
+        if direction == 'radial':
+            # 256×256 の放射グラデーションのうち、box に対応する部分を拡大する
+            sx = 256 / width
+            sy = 256 / height
+            return Image.radial_gradient('L').resize(
+                region, Image.Resampling.BILINEAR,
+                box=(left * sx, top * sy, right * sx, bottom * sy)
+            )
+        if direction == 'diagonal':
+            vertical = cls._gradient_plane(size, 'vertical', box)
+            horizontal = cls._gradient_plane(size, 'horizontal', box)
+            return ImageChops.add(vertical, horizontal, scale=2.0)
+        raise ValueError(f"不明なグラデーション方向: {direction}")
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_gradient(cls, size, color1=(66, 133, 244), color2=(219, 68, 55), direction='vertical', box=None):
+        """グラデーション画像を作成（同じ条件の結果は使い回す）
+        
+        box を指定するとその範囲だけを作成する（キャッシュしない）。
+        """
+        key = (tuple(size), tuple(color1[:3]), tuple(color2[:3]), direction)
+        
+        def compute():
+            plane = cls._gradient_plane(size, direction, box)
+            # 0→255 の値を色1→色2 にLUTで対応付ける
+            bands = [
+                plane.point([int(c1 + (c2 - c1) * v / 255) for v in range(256)])
+                for c1, c2 in zip(color1[:3], color2[:3])
+            ]
+            return Image.merge('RGB', bands).convert('RGBA')
+        
+        if box is not None:
+            return compute()
+        return cls.gradient_cache.get_or_compute(key, compute)
+    
+    @classmethod
+    @RenderTracer.traced
+    def add_gradient_background(cls, image, color1=(66, 133, 244), color2=(219, 68, 55), direction='vertical'):
+        """グラデーション背景を追加"""
+        result = cls.create_gradient(image.size, color1, color2, direction).copy()
         result.paste(image, (0, 0), image)
         
         return result
     
     @staticmethod
+    @RenderTracer.traced
     def add_padding(image, padding=20, background_color=(255, 255, 255, 0)):
         """パディングを追加"""
         new_size = (image.width + padding * 2, image.height + padding * 2)
@@ -204,8 +1844,10 @@ class AdvancedImageProcessor:
         return result
     
     @staticmethod
+    @RenderTracer.traced
     def add_border(image, width=5, color=(0, 0, 0, 255)):
         """枠線を追加"""
+        from PIL import ImageDraw
         result = image.copy()
         draw = ImageDraw.Draw(result)
         draw.rectangle(
@@ -215,62 +1857,258 @@ class AdvancedImageProcessor:
         )
         return result
     
+    # ITU-R 601-2 の輝度係数（PILの 'L' 変換と同じ）
+    LUMA = (0.299, 0.587, 0.114)
+    
+    # 画像ごとのチャンネル別ヒストグラム（画像の同一性がキー）
+    # 画像は弱参照で持つので、キャッシュが画像を生かし続けることはない
+    color_stats_cache = RenderCache(max_entries=16, sizeof=lambda value: 0)
+    
+    @classmethod
+    def channel_histograms(cls, image):
+        """R/G/B それぞれのヒストグラム（同じ画像なら再計算しない）"""
+        key = id(image)
+        entry = cls.color_stats_cache.get(key)
+        # id は解放後に再利用されるため、同じ画像かどうかを弱参照で確かめる
+        if entry is not None and entry[0]() is image:
+            return entry[1]
+        histogram = image.histogram()
+        histograms = [histogram[i * 256:(i + 1) * 256] for i in range(3)]
+        cls.color_stats_cache.put(key, (weakref.ref(image), histograms))
+        return histograms
+    
+    @classmethod
+    @RenderTracer.traced
+    def adjust_colors(cls, image, brightness=1.0, contrast=1.0, saturation=1.0, sharpness=1.0,
+                      histograms=None):
+        """明るさ・コントラスト・彩度を1回の演算でまとめて適用
+        
+        係数の意味は ImageEnhance の Brightness / Contrast / Color / Sharpness と同じで、
+        結果もそれらを順に適用した場合と ±2 程度の誤差で一致する。
+        image が大きな画像の一部（タイル）の場合は、画像全体の histograms を渡す。
+        """
+        from PIL import ImageEnhance
+        result = image
+        if (brightness, contrast, saturation) != (1.0, 1.0, 1.0):
+            if histograms is None:
+                histograms = cls.channel_histograms(image)
+            
+            # 明るさ→コントラストはチャンネル共通のLUTで表せる
+            brightened = [min(255, int(v * brightness)) for v in range(256)]
+            mean = 0.0
+            if contrast != 1.0:
+                # コントラストの基準となる平均輝度をヒストグラムから求める
+                pixels = sum(histograms[0]) or 1
+                for weight, histogram in zip(cls.LUMA, histograms):
+                    mean += weight * sum(n * brightened[v] for v, n in enumerate(histogram))
+                mean = int(mean / pixels + 0.5)
+            lut = [
+                max(0, min(255, int(mean + contrast * (v - mean)))) for v in brightened
+            ]
+            
+            if saturation == 1.0:
+                result = cls._apply_channel_lut(image, lut)
+            else:
+                # 実際の値域で飽和が起きなければ、LUTは1次式なので行列に畳み込める
+                levels = [v for v in range(256) if any(h[v] for h in histograms)]
+                lo, hi = (levels[0], levels[-1]) if levels else (0, 0)
+                gain = brightness * contrast
+                bias = mean * (1 - contrast)
+                linear = (
+                    hi * brightness <= 255
+                    and 0 <= gain * lo + bias
+                    and gain * hi + bias <= 255
+                )
+                if linear:
+                    result = cls._apply_color_matrix(image, saturation, gain, bias)
+                else:
+                    result = cls._apply_color_matrix(
+                        cls._apply_channel_lut(image, lut), saturation
+                    )
+        
+        # シャープネスだけは近傍を参照するため別の畳み込みになる
+        if sharpness != 1.0:
+            with RenderTracer.span('sharpness'):
+                result = ImageEnhance.Sharpness(result).enhance(sharpness)
+        
+        return result
+    
     @staticmethod
-    def apply_glass_effect(image):
+    def _apply_channel_lut(image, lut):
+        """R/G/B に同じLUTを適用（アルファはそのまま）"""
+        identity = list(range(256))
+        tables = lut * 3 + (identity if image.mode == 'RGBA' else [])
+        return image.point(tables)
+    
+    @classmethod
+    def _apply_color_matrix(cls, image, saturation, gain=1.0, bias=0.0):
+        """out = 彩度行列 × (gain × c + bias) を 3×4 行列で一度に計算"""
+        matrix = []
+        for row in range(3):
+            for col in range(3):
+                weight = (1 - saturation) * cls.LUMA[col]
+                if row == col:
+                    weight += saturation
+                matrix.append(weight * gain)
+            # ImageEnhance と同じく切り捨てになるよう 0.5 を引く
+            matrix.append(bias - 0.5)
+        
+        color = image.convert('RGB', tuple(matrix)) if image.mode == 'RGB' else \
+            image.convert('RGB').convert('RGB', tuple(matrix))
+        if image.mode == 'RGBA':
+            color.putalpha(image.getchannel('A'))
+        return color
+    
+    @classmethod
+    def create_glass_highlight(cls, size, box=None):
+        """上部1/3に白いハイライトが薄れていくレイヤーを作成
+        
+        box を指定するとその範囲だけを作成する（キャッシュしない）。
+        """
+        def compute():
+            width, height = size
+            left, top, right, bottom = box or (0, 0, width, height)
+            region = (right - left, bottom - top)
+            band = height // 3
+            alpha = Image.new('L', (1, height), 0)
+            if band > 0:
+                ramp = cls._linear_ramp(band).point(
+                    [int(80 * (1 - v / 255)) for v in range(256)]
+                )
+                alpha.paste(ramp, (0, 0))
+            highlight = Image.new('RGBA', region, (255, 255, 255, 0))
+            highlight.putalpha(
+                alpha.crop((0, top, 1, bottom)).resize(region, Image.Resampling.NEAREST)
+            )
+            return highlight
+        
+        if box is not None:
+            return compute()
+        return cls.gradient_cache.get_or_compute(('glass', tuple(size)), compute)
+    
+    @classmethod
+    @RenderTracer.traced
+    def apply_glass_effect(cls, image):
         """ガラス効果を適用"""
+        from PIL import ImageEnhance
         # 明るさを上げる
         enhancer = ImageEnhance.Brightness(image)
         bright = enhancer.enhance(1.15)
         
-        # ハイライトを追加
-        highlight = Image.new('RGBA', image.size, (255, 255, 255, 0))
-        draw = ImageDraw.Draw(highlight)
-        
         # グラデーションハイライト
-        for i in range(image.height // 3):
-            alpha = int(80 * (1 - i / (image.height // 3)))
-            draw.line([(0, i), (image.width, i)], fill=(255, 255, 255, alpha))
+        highlight = cls.create_glass_highlight(image.size)
         
         result = Image.alpha_composite(bright, highlight)
         return result
     
     @staticmethod
-    def create_circular_mask(image):
+    @RenderTracer.traced
+    def crop_to_square(image):
+        """中央を正方形にトリミング"""
+        width, height = image.size
+        size = min(width, height)
+        left = (width - size) // 2
+        top = (height - size) // 2
+        return image.crop((left, top, left + size, top + size))
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_circular_mask(cls, image):
         """円形マスクを適用"""
-        mask = Image.new('L', image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse([(0, 0), image.size], fill=255)
-        
-        result = Image.new('RGBA', image.size, (0, 0, 0, 0))
-        result.paste(image, (0, 0))
-        result.putalpha(mask)
-        
-        return result
+        return cls.apply_mask(image, cls.create_shape_mask(image.size, 'circle'))
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_squircle_mask(cls, image):
+        """スクワークル（iOS風の角丸）マスクを適用"""
+        return cls.apply_mask(image, cls.create_shape_mask(image.size, 'squircle'))
+    
+    # ノイズの振れ幅（-30〜+30）
+    NOISE_RANGE = 30
+    
+    # 既定のノイズテクスチャの一辺。これより大きい画像には敷き詰めて使う
+    NOISE_TILE = 512
+    
+    # 既定のノイズテクスチャをチャンネルにそろえたもの (モード, 量, シード) -> 画像
+    noise_tiles = RenderCache(max_entries=16, max_bytes=32 * 1024 * 1024)
+    # 画像の大きさまで敷き詰めたノイズ面 (サイズ, モード, 量, シード) -> 画像
+    noise_cache = RenderCache(max_entries=8, max_bytes=128 * 1024 * 1024)
+    
+    @classmethod
+    @RenderTracer.traced
+    def create_noise_texture(cls, size, amount=25, seed=0):
+        """ノイズテクスチャ（'L' 画像）を作成
+        
+        各ピクセルの値は ノイズ量+30（ノイズなしは30）。同じ seed からは常に
+        同じテクスチャが得られ、タイル状に敷き詰めて再利用できる。
+        """
+        width, height = size
+        span = cls.NOISE_RANGE * 2 + 1
+        # 約 amount% のピクセルに適用（0〜100 の101段階で判定）
+        threshold = amount * 256 // 101
+        
+        # 1バイトの乱数で「適用するか」と「ノイズ量」を同時に決める
+        lut = [
+            v * span // threshold if v < threshold else cls.NOISE_RANGE
+            for v in range(256)
+        ]
+        noise = Image.frombytes('L', size, random.Random(seed).randbytes(width * height))
+        return noise.point(lut)
     
     @staticmethod
-    def add_noise(image, amount=25):
-        """ノイズを追加"""
-        import random
-        result = image.copy()
-        pixels = result.load()
-        
-        for i in range(result.width):
-            for j in range(result.height):
-                if random.randint(0, 100) < amount:
-                    r, g, b, a = pixels[i, j]
-                    noise = random.randint(-30, 30)
-                    r = max(0, min(255, r + noise))
-                    g = max(0, min(255, g + noise))
-                    b = max(0, min(255, b + noise))
-                    pixels[i, j] = (r, g, b, a)
-        
+    def _tile(plane, size):
+        """画像を size になるまでタイル状に敷き詰める（plane の方が大きければ切り出す）"""
+        if plane.size == tuple(size):
+            return plane
+        if plane.width >= size[0] and plane.height >= size[1]:
+            return plane.crop((0, 0, *size))
+        result = Image.new(plane.mode, size)
+        for top in range(0, size[1], plane.height):
+            for left in range(0, size[0], plane.width):
+                result.paste(plane, (left, top))
         return result
+    
+    @classmethod
+    @RenderTracer.traced
+    def add_noise(cls, image, amount=25, seed=0, texture=None):
+        """ノイズを追加
+        
+        結果は seed で決まる。texture を省くと (amount, seed) ごとに一度だけ作る
+        NOISE_TILE 角のテクスチャを、渡すとそれを敷き詰めて使う。画像と同じ
+        大きさの乱数を毎回作らないので、初めてのサイズでも速い。
+        """
+        from PIL import ImageChops
+        def channels(plane):
+            bands = (plane,) * 3
+            if image.mode == 'RGBA':
+                # アルファには +30-30 で変化しない値を入れる
+                bands += (Image.new('L', plane.size, cls.NOISE_RANGE),)
+            return Image.merge(image.mode, bands)
+        
+        def default_tile():
+            return channels(cls.create_noise_texture((cls.NOISE_TILE,) * 2, amount, seed))
+        
+        if texture is None:
+            # チャンネルをそろえたタイルを敷き詰めるだけなので、初めてのサイズでも
+            # 画像全体に対する処理は最後の add だけになる
+            tile = cls.noise_tiles.get_or_compute((image.mode, amount, seed), default_tile)
+            noise = cls.noise_cache.get_or_compute(
+                (image.size, image.mode, amount, seed), lambda: cls._tile(tile, image.size)
+            )
+        else:
+            noise = channels(cls._tile(texture, image.size))
+        # 各チャンネルに ノイズ-30 を加算（0〜255 に飽和）
+        # 正負に分けた面で darker/lighter と add_modulo/subtract_modulo を
+        # 組み合わせる整数演算版も同じ結果になるが、Pillowでは darker/lighter も
+        # 飽和付きの同じループで処理されるため、1回の add より遅い（1024²で約1.5倍）
+        return ImageChops.add(image, noise, 1.0, -cls.NOISE_RANGE)
 
 
 class PresetDialog(QDialog):
     """プリセット選択ダイアログ"""
     
     def __init__(self, parent=None):
+        from PySide6.QtWidgets import QListWidget, QDialogButtonBox
         super().__init__(parent)
         self.setWindowTitle("プリセットを選択")
         self.setMinimumWidth(400)
@@ -375,46 +2213,45 @@ class PresetManager:
     }
     
     @classmethod
-    def apply_preset(cls, image, preset_name):
-        """プリセットを適用"""
+    @RenderTracer.traced
+    def apply_preset(cls, image, preset_name, scale=1.0):
+        """プリセットを適用
+        
+        scale は元画像に対する image の倍率。縮小した作業画像でも元画像に
+        適用した場合と同じ見た目になるよう、ピクセル単位の値をスケールする
+        （RenderPipeline.scale_params と同じ規則）。
+        """
         if preset_name not in cls.PRESETS:
             return image
         
         preset = cls.PRESETS[preset_name]
         result = image.copy()
         
-        # 明るさ
-        if 'brightness' in preset and preset['brightness'] != 0:
-            enhancer = ImageEnhance.Brightness(result)
-            result = enhancer.enhance(1 + preset['brightness'] / 100)
-        
-        # コントラスト
-        if 'contrast' in preset and preset['contrast'] != 0:
-            enhancer = ImageEnhance.Contrast(result)
-            result = enhancer.enhance(1 + preset['contrast'] / 100)
-        
-        # 彩度
-        if 'saturation' in preset and preset['saturation'] != 0:
-            enhancer = ImageEnhance.Color(result)
-            result = enhancer.enhance(1 + preset['saturation'] / 100)
-        
-        # シャープネス
-        if preset.get('sharpen'):
-            enhancer = ImageEnhance.Sharpness(result)
-            result = enhancer.enhance(1 + preset['sharpen'] / 100)
+        def pixels(value):
+            # 0でない値は縮小しても消えないよう最低1pxを保つ
+            return max(1, round(value * scale)) if value > 0 else value
+        
+        # 明るさ・コントラスト・彩度・シャープネス
+        result = AdvancedImageProcessor.adjust_colors(
+            result,
+            brightness=1 + preset.get('brightness', 0) / 100,
+            contrast=1 + preset.get('contrast', 0) / 100,
+            saturation=1 + preset.get('saturation', 0) / 100,
+            sharpness=1 + preset.get('sharpen', 0) / 100
+        )
         
         # 角丸
         if preset.get('rounded_corners'):
-            radius = preset.get('corner_radius', 20)
+            radius = pixels(preset.get('corner_radius', 20))
             result = AdvancedImageProcessor.create_rounded_corners(result, radius)
         
         # パディング
         if preset.get('padding'):
-            result = AdvancedImageProcessor.add_padding(result, preset['padding'])
+            result = AdvancedImageProcessor.add_padding(result, pixels(preset['padding']))
         
         # 枠線
         if preset.get('border'):
-            width = preset.get('border_width', 3)
+            width = pixels(preset.get('border_width', 3))
             result = AdvancedImageProcessor.add_border(result, width)
         
         # ガラス効果
@@ -423,27 +2260,741 @@ class PresetManager:
         
         # ノイズ
         if preset.get('noise'):
-            result = AdvancedImageProcessor.add_noise(result, preset['noise'])
+            result = AdvancedImageProcessor.add_noise(
+                result, preset['noise'], seed=preset.get('noise_seed', 0)
+            )
         
         # 影（最後に適用）
         if preset.get('shadow'):
-            blur = preset.get('shadow_blur', 10)
+            blur = preset.get('shadow_blur', 10) * scale
+            # add_drop_shadow の既定のずれ (8, 8) もスケールする
+            offset = tuple(round(v * scale) for v in (8, 8))
             result = AdvancedImageProcessor.add_drop_shadow(
-                result, blur_radius=blur
+                result, offset=offset, blur_radius=blur
+            )
+        
+        return result
+
+
+class RenderPipeline:
+    """調整 → エフェクト → 背景 のレンダリングパイプライン（GUI非依存）"""
+
+    DEFAULT_PARAMS = {
+        # 調整
+        'brightness': 0,
+        'contrast': 0,
+        'saturation': 0,
+        'sharpness': 0,
+        # エフェクト
+        'blur': 0,
+        'rounded_corners': False,
+        'corner_radius': 30,
+        'shadow': False,
+        'shadow_blur': 15,
+        'shadow_offset': (8, 8),
+        'border': False,
+        'border_width': 5,
+        'glass_effect': False,
+        # 背景
+        'padding': 0,
+        'bg_color_enabled': False,
+        'bg_color': (255, 255, 255, 255),
+        'gradient': False,
+        'gradient_color1': (66, 133, 244),
+        'gradient_color2': (219, 68, 55),
+        'gradient_direction': 'vertical'
+    }
+
+    COLOR_KEYS = ('bg_color', 'gradient_color1', 'gradient_color2')
+    
+    # ピクセル単位のパラメータ（プロキシ解像度に合わせてスケールする）
+    PIXEL_KEYS = ('blur', 'corner_radius', 'shadow_blur', 'border_width', 'padding')
+    
+    # 各段階の出力に影響するパラメータ（キャッシュキー）
+    ADJUSTMENT_KEYS = ('brightness', 'contrast', 'saturation', 'sharpness')
+    EFFECT_KEYS = (
+        'blur', 'rounded_corners', 'corner_radius', 'border', 'border_width',
+        'glass_effect', 'shadow', 'shadow_blur', 'shadow_offset'
+    )
+    BACKGROUND_KEYS = (
+        'padding', 'bg_color_enabled', 'bg_color', 'gradient',
+        'gradient_color1', 'gradient_color2', 'gradient_direction'
+    )
+    
+    # 段階・処理ごとの出力キャッシュ（入力画像の同一性とパラメータがキー）
+    cache = RenderCache()
+    
+    # これ以上の画素数の画像はタイル単位で描画する（1枚で256MBを超える大きさ）
+    # GUIとバッチの作業画像はここまで大きくならない（TiledRenderer を参照）
+    TILED_MIN_PIXELS = 8192 * 8192
+
+    @classmethod
+    def normalize_params(cls, params=None):
+        """既定値を補い、JSON由来のリストをタプルに揃える"""
+        result = dict(cls.DEFAULT_PARAMS)
+        if params:
+            unknown = set(params) - set(cls.DEFAULT_PARAMS)
+            if unknown:
+                raise ValueError(f"不明なパラメータ: {', '.join(sorted(unknown))}")
+            result.update(params)
+
+        for key in cls.COLOR_KEYS + ('shadow_offset',):
+            result[key] = tuple(result[key])
+
+        return result
+
+    @classmethod
+    def scale_params(cls, params, scale):
+        """縮小した作業画像でも最終結果と同じ見た目になるようにパラメータをスケール"""
+        if scale == 1:
+            return params
+
+        result = dict(params)
+        for key in cls.PIXEL_KEYS:
+            value = params[key] * scale
+            if key in ('blur', 'shadow_blur'):
+                result[key] = value
+            elif params[key] > 0:
+                # 0でない値は縮小しても消えないよう最低1pxを保つ
+                result[key] = max(1, round(value))
+        result['shadow_offset'] = tuple(round(v * scale) for v in params['shadow_offset'])
+        return result
+
+    @classmethod
+    def load_params(cls, file_path):
+        """パラメータファイル(JSON)を読み込む"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls.normalize_params(json.load(f))
+
+    @classmethod
+    def cached_op(cls, name, image, key, compute):
+        """入力画像の同一性とパラメータをキーに処理結果をキャッシュ"""
+        cache_key = (name, id(image), key)
+        entry = cls.cache.get(cache_key)
+        # エントリが入力画像を保持しているのでidが再利用されることはないが念のため確認
+        if entry is not None and entry[0] is image:
+            return entry[1]
+        with RenderTracer.span(name, 'stage'):
+            result = compute()
+        cls.cache.put(cache_key, (image, result))
+        return result
+
+    @classmethod
+    def cached_stage(cls, name, image, params, keys, compute):
+        """段階全体の結果をキャッシュ"""
+        key = tuple(params[k] for k in keys)
+        return cls.cached_op(name, image, key, lambda: compute(image, params))
+
+    @classmethod
+    def apply_adjustments(cls, image, params):
+        """画像に調整を適用"""
+        return cls.cached_stage(
+            'adjustments', image, params, cls.ADJUSTMENT_KEYS, cls._apply_adjustments
+        )
+
+    @classmethod
+    def _apply_adjustments(cls, image, params):
+        # 明るさ・コントラスト・彩度・シャープネス
+        factors = tuple(1 + params[key] / 100.0 for key in cls.ADJUSTMENT_KEYS)
+        if factors == (1.0, 1.0, 1.0, 1.0):
+            return image
+
+        return cls.cached_op(
+            'colors', image, factors,
+            lambda: AdvancedImageProcessor.adjust_colors(image, *factors)
+        )
+
+    @classmethod
+    def apply_effects(cls, image, params):
+        """画像にエフェクトを適用"""
+        return cls.cached_stage(
+            'effects', image, params, cls.EFFECT_KEYS, cls._apply_effects
+        )
+
+    @classmethod
+    def _apply_effects(cls, image, params):
+        from PIL import ImageFilter
+        result = image
+
+        # ぼかし
+        blur_value = params['blur']
+        if blur_value > 0:
+            result = cls.cached_op(
+                'blur', result, blur_value,
+                lambda src=result: src.filter(ImageFilter.GaussianBlur(blur_value / 2))
+            )
+
+        # 角丸
+        if params['rounded_corners']:
+            radius = params['corner_radius']
+            result = cls.cached_op(
+                'rounded_corners', result, radius,
+                lambda src=result: AdvancedImageProcessor.create_rounded_corners(src, radius)
+            )
+
+        # 枠線
+        if params['border']:
+            width = params['border_width']
+            result = cls.cached_op(
+                'border', result, width,
+                lambda src=result: AdvancedImageProcessor.add_border(src, width)
+            )
+
+        # ガラス効果
+        if params['glass_effect']:
+            result = cls.cached_op(
+                'glass_effect', result, None,
+                lambda src=result: AdvancedImageProcessor.apply_glass_effect(src)
+            )
+
+        # 影（最後に適用）
+        if params['shadow']:
+            blur = params['shadow_blur']
+            offset = params['shadow_offset']
+            result = cls.cached_op(
+                'shadow', result, (offset, blur),
+                lambda src=result: AdvancedImageProcessor.add_drop_shadow(
+                    src, offset=offset, blur_radius=blur
+                )
+            )
+
+        return result
+
+    @classmethod
+    def apply_background(cls, image, params):
+        """画像に背景を適用"""
+        return cls.cached_stage(
+            'background', image, params, cls.BACKGROUND_KEYS, cls._apply_background
+        )
+
+    @classmethod
+    def _apply_background(cls, image, params):
+        result = image
+
+        # パディング
+        padding = params['padding']
+        if padding > 0:
+            result = cls.cached_op(
+                'padding', result, padding,
+                lambda src=result: AdvancedImageProcessor.add_padding(src, padding)
+            )
+
+        # 背景色
+        if params['bg_color_enabled']:
+            bg_color = params['bg_color']
+            result = cls.cached_op(
+                'bg_color', result, bg_color,
+                lambda src=result: cls.composite_on_color(src, bg_color)
+            )
+
+        # グラデーション
+        if params['gradient']:
+            colors = (params['gradient_color1'], params['gradient_color2'])
+            direction = params['gradient_direction']
+            result = cls.cached_op(
+                'gradient', result, (colors, direction),
+                lambda src=result: AdvancedImageProcessor.add_gradient_background(
+                    src, colors[0], colors[1], direction
+                )
+            )
+
+        return result
+
+    @staticmethod
+    def composite_on_color(image, color):
+        """単色の背景に画像を重ねる"""
+        bg = Image.new('RGBA', image.size, color)
+        final = Image.new('RGBA', image.size)
+        final.paste(bg, (0, 0))
+        final.paste(image, (0, 0), image)
+        return final
+
+    @classmethod
+    def render(cls, image, params, is_cancelled=None, tiled=None):
+        """3段階のパイプラインをまとめて適用
+        
+        is_cancelled が True を返した場合は段階の境目で打ち切り、None を返す。
+        tiled が None の場合、TILED_MIN_PIXELS 以上の画像は TiledRenderer で描画する
+        （途中の段階はキャッシュしない）。
+        """
+        if tiled is None:
+            tiled = image.width * image.height >= cls.TILED_MIN_PIXELS
+        if tiled:
+            return TiledRenderer(image, params).render(is_cancelled)
+        
+        stages = (cls.apply_adjustments, cls.apply_effects, cls.apply_background)
+        result = image
+        for stage in stages:
+            if is_cancelled and is_cancelled():
+                return None
+            result = stage(result, params)
+
+        return result
+
+
+class TiledRenderer:
+    """レンダリングパイプラインをタイル単位で実行する（GUI非依存）
+    
+    各段階を「出力の矩形を作るのに入力のどの矩形が要るか」と「入力の矩形から
+    出力の矩形を作る処理」の組で表し、出力のタイルごとにチェーンを逆にたどる。
+    近傍を参照する段階（シャープネス・ぼかし・影）は周囲を重ねて（ハロー）
+    切り出すので継ぎ目は出ず、結果は RenderPipeline.render と一致する。
+    途中の段階の全体画像を作らないため、メモリは入力と出力と処理中のタイルの分で済む。
+    
+    GUIとバッチは SourceDecoder で書き出しに必要な解像度（短辺2048px程度）まで
+    縮小してから描画するため、ここを通るのは縦横比が極端な画像だけになる。
+    主な利用者は、フル解像度のマスター画像を RenderPipeline.render に直接渡す
+    呼び出し元（GUI非依存のAPIとしての利用）。
+    """
+    
+    TILE_SIZE = 1024
+    
+    # 影を縮小してぼかす場合に、縮小後の座標で余分に切り出す幅（BICUBIC拡大の参照範囲）
+    RESAMPLE_MARGIN = 3
+    
+    def __init__(self, image, params, max_workers=None, tile_size=None):
+        self.source = image if image.mode == 'RGBA' else image.convert('RGBA')
+        self.params = params
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tile_size = tile_size or self.TILE_SIZE
+        self.stages = []  # (名前, 出力サイズ, need(box), apply(tile, in_box, box))
+        self.plan()
+    
+    @property
+    def size(self):
+        """最終的な出力サイズ"""
+        return self.stages[-1][1] if self.stages else self.source.size
+    
+    # ------------------------------------------------------------------
+    # 矩形の計算
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def clip(box, size):
+        """box を画像の範囲に収める（範囲外なら None）"""
+        left, top = max(0, box[0]), max(0, box[1])
+        right, bottom = min(size[0], box[2]), min(size[1], box[3])
+        if left >= right or top >= bottom:
+            return None
+        return (left, top, right, bottom)
+    
+    @staticmethod
+    def shift(box, dx, dy):
+        return (box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy)
+    
+    @classmethod
+    def grow(cls, box, margin, size):
+        """box を周囲に margin だけ広げる（画像の範囲内）"""
+        return cls.clip((box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin), size)
+    
+    @staticmethod
+    def union(*boxes):
+        boxes = [box for box in boxes if box]
+        if not boxes:
+            return None
+        return (
+            min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes)
+        )
+    
+    @staticmethod
+    def relative(box, origin):
+        """box を origin の左上を原点とする座標に直す"""
+        return (box[0] - origin[0], box[1] - origin[1], box[2] - origin[0], box[3] - origin[1])
+    
+    @staticmethod
+    def blur_halo(radius):
+        """GaussianBlur(radius) が参照する周囲の幅（3回のボックスぼかし）"""
+        return 3 * (math.ceil(radius) + 1)
+    
+    # ------------------------------------------------------------------
+    # 段階の組み立て
+    # ------------------------------------------------------------------
+    
+    def add_stage(self, name, apply, halo=0):
+        """大きさの変わらない段階を追加（halo は参照する周囲の幅）"""
+        size = self.size
+        
+        def need(box):
+            return self.grow(box, halo, size) if halo else box
+        
+        def run(tile, in_box, box):
+            result = apply(tile, in_box)
+            if in_box != box:
+                result = result.crop(self.relative(box, in_box))
+            return result
+        
+        self.stages.append((name, size, need, run))
+    
+    def plan(self):
+        """RenderPipeline と同じ順序で段階を並べる"""
+        from PIL import ImageEnhance, ImageFilter
+        P = AdvancedImageProcessor
+        params = self.params
+        
+        # 調整（コントラストの基準は画像全体のヒストグラムから求める）
+        factors = tuple(1 + params[key] / 100.0 for key in RenderPipeline.ADJUSTMENT_KEYS)
+        if factors[:3] != (1.0, 1.0, 1.0):
+            histograms = P.channel_histograms(self.source)
+            self.add_stage('colors', lambda tile, box: P.adjust_colors(
+                tile, *factors[:3], histograms=histograms
+            ))
+        if factors[3] != 1.0:
+            # SMOOTH フィルタは3×3
+            self.add_stage(
+                'sharpness',
+                lambda tile, box: ImageEnhance.Sharpness(tile).enhance(factors[3]),
+                halo=1
+            )
+        
+        # エフェクト
+        # （各段階の関数は後から参照するので、段階ごとに別の変数に束縛する）
+        if params['blur'] > 0:
+            blur_radius = params['blur'] / 2
+            self.add_stage(
+                'blur',
+                lambda tile, box: tile.filter(ImageFilter.GaussianBlur(blur_radius)),
+                halo=self.blur_halo(blur_radius)
+            )
+        if params['rounded_corners']:
+            mask_size, corner_radius = self.size, params['corner_radius']
+            self.add_stage('rounded_corners', lambda tile, box: P.apply_mask(
+                tile, P.create_shape_mask(mask_size, 'rounded_rect', corner_radius, box)
+            ))
+        if params['border']:
+            self.add_stage('border', self.border_stage(params['border_width']))
+        if params['glass_effect']:
+            glass_size = self.size
+            self.add_stage('glass_effect', lambda tile, box: Image.alpha_composite(
+                ImageEnhance.Brightness(tile).enhance(1.15),
+                P.create_glass_highlight(glass_size, box)
+            ))
+        if params['shadow']:
+            self.add_shadow_stage(params['shadow_offset'], params['shadow_blur'])
+        
+        # 背景
+        if params['padding'] > 0:
+            self.add_padding_stage(params['padding'])
+        if params['bg_color_enabled']:
+            color = params['bg_color']
+            self.add_stage(
+                'bg_color', lambda tile, box: RenderPipeline.composite_on_color(tile, color)
+            )
+        if params['gradient']:
+            gradient_size = self.size
+            colors = (params['gradient_color1'], params['gradient_color2'])
+            direction = params['gradient_direction']
+            
+            def gradient(tile, box):
+                result = P.create_gradient(gradient_size, colors[0], colors[1], direction, box)
+                result.paste(tile, (0, 0), tile)
+                return result
+            
+            self.add_stage('gradient', gradient)
+    
+    def border_stage(self, width, color=(0, 0, 0, 255)):
+        """画像全体の外周に枠線を描く処理（タイルの位置に合わせてずらす）"""
+        from PIL import ImageDraw
+        full_width, full_height = self.size
+        
+        def apply(tile, box):
+            result = tile.copy()
+            left, top = box[:2]
+            ImageDraw.Draw(result).rectangle(
+                [(-left, -top), (full_width - 1 - left, full_height - 1 - top)],
+                outline=color,
+                width=width
+            )
+            return result
+        
+        return apply
+    
+    def add_padding_stage(self, padding):
+        in_size = self.size
+        size = (in_size[0] + padding * 2, in_size[1] + padding * 2)
+        
+        def need(box):
+            return self.clip(self.shift(box, -padding, -padding), in_size)
+        
+        def run(tile, in_box, box):
+            result = Image.new('RGBA', (box[2] - box[0], box[3] - box[1]), (255, 255, 255, 0))
+            if tile is not None:
+                result.paste(tile, (in_box[0] + padding - box[0], in_box[1] + padding - box[1]), tile)
+            return result
+        
+        self.stages.append(('padding', size, need, run))
+    
+    def add_shadow_stage(self, offset, blur_radius):
+        """AdvancedImageProcessor.add_drop_shadow と同じ影をタイルごとに作る段階"""
+        from PIL import ImageFilter
+        P = AdvancedImageProcessor
+        in_size = self.size
+        pad_x, pad_y = abs(offset[0]), abs(offset[1])
+        size = (in_size[0] + pad_x * 3, in_size[1] + pad_y * 3)
+        # 影の形（アルファ）を置く位置と、元の画像を置く位置
+        mask_dx, mask_dy = pad_x + offset[0], pad_y + offset[1]
+        factor = P.shadow_factor(blur_radius)
+        reduced_size = (-(-size[0] // factor), -(-size[1] // factor))
+        reduced_halo = self.blur_halo(blur_radius / factor) + (
+            self.RESAMPLE_MARGIN if factor > 1 else 0
+        )
+        
+        def mask_region(box):
+            """box の影を作るのに必要な影レイヤー上の範囲（縮小する場合は倍率の倍数に揃える）"""
+            if factor == 1:
+                return self.grow(box, reduced_halo, size)
+            reduced = self.clip((
+                box[0] // factor - reduced_halo, box[1] // factor - reduced_halo,
+                -(-box[2] // factor) + reduced_halo, -(-box[3] // factor) + reduced_halo
+            ), reduced_size)
+            return (
+                reduced[0] * factor, reduced[1] * factor,
+                min(size[0], reduced[2] * factor), min(size[1], reduced[3] * factor)
+            )
+        
+        def need(box):
+            region = mask_region(box)
+            return self.union(
+                self.clip(self.shift(region, -mask_dx, -mask_dy), in_size),
+                self.clip(self.shift(box, -pad_x, -pad_y), in_size)
             )
         
+        def run(tile, in_box, box):
+            region = mask_region(box)
+            mask = Image.new('L', (region[2] - region[0], region[3] - region[1]), 0)
+            alpha_box = self.clip(self.shift(region, -mask_dx, -mask_dy), in_size)
+            if alpha_box:
+                alpha = tile.getchannel('A').crop(self.relative(alpha_box, in_box))
+                mask.paste(alpha, (alpha_box[0] + mask_dx - region[0], alpha_box[1] + mask_dy - region[1]))
+            
+            if factor == 1:
+                mask = mask.filter(ImageFilter.GaussianBlur(blur_radius)).crop(
+                    self.relative(box, region)
+                )
+            else:
+                # 影レイヤー全体を縮小してぼかし、拡大した場合の box の部分
+                left, top = region[0] / factor, region[1] / factor
+                mask = mask.reduce(factor).filter(
+                    ImageFilter.GaussianBlur(blur_radius / factor)
+                ).resize(
+                    (box[2] - box[0], box[3] - box[1]),
+                    Image.Resampling.BICUBIC,
+                    box=(
+                        box[0] / factor - left, box[1] / factor - top,
+                        box[2] / factor - left, box[3] / factor - top
+                    )
+                )
+            result = P.tint_mask(mask, P.SHADOW_COLOR)
+            
+            # 元の画像を影の上に配置
+            image_box = self.clip(self.shift(box, -pad_x, -pad_y), in_size)
+            if image_box:
+                image = tile.crop(self.relative(image_box, in_box))
+                result.paste(image, (image_box[0] + pad_x - box[0], image_box[1] + pad_y - box[1]), image)
+            return result
+        
+        self.stages.append(('shadow', size, need, run))
+    
+    # ------------------------------------------------------------------
+    # 実行
+    # ------------------------------------------------------------------
+    
+    def render_box(self, index, box):
+        """index 番目の段階の出力のうち box の範囲（box が None なら None）"""
+        if box is None:
+            return None
+        if index < 0:
+            return self.source.crop(box)
+        name, _, need, run = self.stages[index]
+        in_box = need(box)
+        tile = self.render_box(index - 1, in_box)
+        with RenderTracer.span(name, 'stage'):
+            return run(tile, in_box, box)
+    
+    def tiles(self):
+        """出力を分割したタイルの矩形"""
+        width, height = self.size
+        step = self.tile_size
+        return [
+            (left, top, min(width, left + step), min(height, top + step))
+            for top in range(0, height, step)
+            for left in range(0, width, step)
+        ]
+    
+    def render_tile(self, box, frame=None):
+        with RenderTracer.attach(frame), RenderTracer.span('tile', 'stage'):
+            return box, self.render_box(len(self.stages) - 1, box)
+    
+    def render(self, is_cancelled=None):
+        """全タイルを並列に描画して1枚にまとめる
+        
+        処理中のタイルはワーカー数の2倍までに抑える。is_cancelled が True を
+        返した場合は打ち切り、None を返す。
+        """
+        if not self.stages:
+            return self.source
+        
+        result = Image.new('RGBA', self.size)
+        frame = RenderTracer.current_frame()
+        limit = self.max_workers * 2
+        running = set()
+        
+        def collect(return_when):
+            nonlocal running
+            finished, running = wait(running, return_when=return_when)
+            for future in finished:
+                box, tile = future.result()
+                result.paste(tile, box[:2])
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for box in self.tiles():
+                if is_cancelled and is_cancelled():
+                    for future in running:
+                        future.cancel()
+                    return None
+                running.add(executor.submit(self.render_tile, box, frame))
+                if len(running) >= limit:
+                    collect(FIRST_COMPLETED)
+            collect(ALL_COMPLETED)
+        
         return result
 
 
+class PreviewRenderThread(QThread):
+    """プレビューを描画する専用スレッド（最新の要求だけを処理する）"""
+    rendered = Signal(int, object)
+    error = Signal(int, str)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = None  # (世代, 画像, パラメータ)
+        self._generation = 0
+        self._running = True
+    
+    def submit(self, image, params):
+        """描画要求を投入（未処理の古い要求は破棄される）。世代番号を返す"""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, image, params)
+            self._condition.notify()
+            return self._generation
+    
+    def cancel(self):
+        """未処理・処理中の要求をすべて無効にする"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+    
+    def is_stale(self, generation):
+        """その世代の要求が既に古くなっているか"""
+        return generation != self._generation
+    
+    def stop(self):
+        """スレッドを終了して待機"""
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+    
+    def run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                generation, image, params = self._pending
+                self._pending = None
+            
+            try:
+                with RenderTracer.frame('render'):
+                    result = RenderTracer.profiled(
+                        RenderPipeline.render, image, params, lambda: self.is_stale(generation)
+                    )
+            except Exception as e:
+                self.error.emit(generation, str(e))
+                continue
+            
+            if result is not None and not self.is_stale(generation):
+                self.rendered.emit(generation, result)
+
+
+class PreviewBridge:
+    """PIL画像とQImageで1つのバッファを共有するプレビュー用のブリッジ
+    
+    QImageが確保したメモリをそのままPILの画像として書き込めるようにし、
+    サイズが変わらない限り同じバッファを使い回す。
+    """
+    
+    def __init__(self):
+        self.qimage = None
+        self.frame = None  # qimage のメモリを指すPIL画像
+    
+    def acquire(self, size):
+        """size の共有バッファ（PIL画像）を返す"""
+        if self.frame is None or self.frame.size != tuple(size):
+            width, height = size
+            self.qimage = QImage(width, height, QImage.Format_RGBA8888)
+            self.frame = Image.frombuffer(
+                'RGBA', (width, height), self.qimage.bits(),
+                'raw', 'RGBA', self.qimage.bytesPerLine(), 1
+            )
+            # frombuffer の画像は読み取り専用なので、書き込み時にコピーされないようにする
+            self.frame.readonly = 0
+        return self.frame
+    
+    def pixmap(self):
+        """共有バッファの内容からQPixmapを作成"""
+        return QPixmap.fromImage(self.qimage)
+    
+    @staticmethod
+    def thumbnail(image, box):
+        """box に収まるように縮小した画像（元画像はコピーしない）"""
+        width, height = image.size
+        scale = min(box[0] / width, box[1] / height)
+        if scale >= 1:
+            return image
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
 class RichIconGenerator(QMainWindow):
     def __init__(self):
         super().__init__()
         self.source_image = None
+        self.source_scale = 1.0  # source_image の元画像に対する倍率
+        self.source_partial = False  # source_imageがプレビュー用の縮小デコードかどうか
+        self.source_info = None  # (ファイル名, 元のサイズ, 元のモード)
+        self.source_generation = 0
+        self.source_loader = None  # デコード中のスレッド
+        self.loaded_render_generation = 0
         self.edited_image = None
+        self.preview_source = None  # プレビュー用の縮小プロキシ
+        self.proxy_scale = 1.0  # preview_source の元画像に対する倍率
+        self.edited_is_proxy = False  # edited_imageがプロキシ解像度かどうか
         self.current_preset = None
-        self.history = []
-        self.history_index = -1
-        self.max_history = 20  # 履歴の最大数
+        self.history = HistoryStore()  # 履歴（操作ログとキーフレーム）
+        self.preview_bridges = {}  # 表示先ラベルごとの共有バッファ
+        self.previewed_image = None  # 最後にプレビューへ描画した編集画像
+        
+        # スライダー操作をまとめてから描画スレッドへ渡す
+        self.render_generation = 0
+        self.applied_render_generation = 0
+        # 最後に表示した描画エラー（同じエラーのダイアログを繰り返し出さない）
+        self.preview_error = None
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(15)
+        self.render_timer.timeout.connect(self.submit_preview_render)
+        
+        self.render_worker = PreviewRenderThread()
+        self.render_worker.rendered.connect(self.on_preview_rendered)
+        self.render_worker.error.connect(self.on_preview_error)
+        self.render_worker.start()
+        # ウィンドウを閉じずに終了した場合もスレッドを止める
+        atexit.register(self.render_worker.stop)
         
         self.init_ui()
         self.apply_modern_style()
@@ -475,9 +3026,50 @@ class RichIconGenerator(QMainWindow):
         
         main_layout.addWidget(splitter)
         
+        # ツールメニュー（計測・トレース）
+        self.create_tools_menu()
+        
         # ステータスバー
+        self.timing_label = QLabel('')
+        self.timing_label.setStyleSheet("color: #666;")
+        self.timing_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.timing_label)
+        self.history_label = QLabel('')
+        self.history_label.setStyleSheet("color: #666;")
+        self.statusBar().addPermanentWidget(self.history_label)
         self.statusBar().showMessage('画像を選択してください')
     
+    def create_tools_menu(self):
+        """ツールメニューの作成"""
+        menu = self.menuBar().addMenu('ツール')
+        
+        self.show_timings_action = QAction('処理時間を表示', self, checkable=True)
+        self.show_timings_action.toggled.connect(self.toggle_timings)
+        menu.addAction(self.show_timings_action)
+        menu.addSeparator()
+        
+        self.trace_action = QAction('トレースを記録', self, checkable=True)
+        self.trace_action.toggled.connect(self.toggle_trace)
+        menu.addAction(self.trace_action)
+        
+        self.profile_action = QAction('プロファイルを記録', self, checkable=True)
+        self.profile_action.toggled.connect(self.toggle_profile)
+        menu.addAction(self.profile_action)
+        menu.addSeparator()
+        
+        clear_cache_action = QAction('レンダリングキャッシュを削除', self)
+        clear_cache_action.triggered.connect(self.clear_render_cache)
+        menu.addAction(clear_cache_action)
+    
+    def clear_render_cache(self):
+        """ディスクに保存したレンダリング結果を削除"""
+        cache = DiskRenderCache.default()
+        cache.clear()
+        self.statusBar().showMessage(
+            f'レンダリングキャッシュを削除しました: {cache.root}' if cache.enabled
+            else 'レンダリングキャッシュは無効です（ICON_RENDER_CACHE）'
+        )
+    
     def create_preview_area(self):
         """プレビューエリアの作成"""
         widget = QWidget()
@@ -687,12 +3279,32 @@ class RichIconGenerator(QMainWindow):
             }
         """)
         
-        # 各タブを作成
-        self.tab_widget.addTab(self.create_quick_tab(), "⚡ クイック")
-        self.tab_widget.addTab(self.create_adjust_tab(), "🎨 調整")
-        self.tab_widget.addTab(self.create_effect_tab(), "✨ エフェクト")
-        self.tab_widget.addTab(self.create_background_tab(), "🖼️ 背景")
-        self.tab_widget.addTab(self.create_export_tab(), "💾 エクスポート")
+        # 各タブの中身は初めて表示したときに作成する（起動を速くするため）
+        self.tab_builders = {
+            'quick': self.create_quick_tab,
+            'adjust': self.create_adjust_tab,
+            'effect': self.create_effect_tab,
+            'background': self.create_background_tab,
+            'export': self.create_export_tab
+        }
+        self.tab_keys = []
+        self.built_tabs = set()
+        for key, title in (
+            ('quick', "⚡ クイック"),
+            ('adjust', "🎨 調整"),
+            ('effect', "✨ エフェクト"),
+            ('background', "🖼️ 背景"),
+            ('export', "💾 エクスポート")
+        ):
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tab_widget.addTab(page, title)
+            self.tab_keys.append(key)
+        self.tab_widget.currentChanged.connect(
+            lambda index: self.ensure_tab(self.tab_keys[index])
+        )
+        self.ensure_tab('quick')
         
         scroll_layout.addWidget(self.tab_widget)
         scroll.setWidget(scroll_content)
@@ -700,6 +3312,14 @@ class RichIconGenerator(QMainWindow):
         
         return widget
     
+    def ensure_tab(self, key):
+        """タブの中身がまだなければ作成"""
+        if key in self.built_tabs:
+            return
+        self.built_tabs.add(key)
+        page = self.tab_widget.widget(self.tab_keys.index(key))
+        page.layout().addWidget(self.tab_builders[key]())
+    
     def create_quick_tab(self):
         """クイックタブの作成"""
         tab = QWidget()
@@ -738,6 +3358,7 @@ class RichIconGenerator(QMainWindow):
             ('↔️ 水平反転', self.flip_horizontal),
             ('↕️ 垂直反転', self.flip_vertical),
             ('⭕ 円形マスク', self.apply_circular_mask),
+            ('▢ スクワークルマスク', self.apply_squircle_mask),
             ('📐 正方形にトリミング', self.crop_to_square),
         ]
         
@@ -975,7 +3596,7 @@ class RichIconGenerator(QMainWindow):
         direction_layout.addWidget(direction_label)
         
         self.gradient_direction = QComboBox()
-        self.gradient_direction.addItems(["垂直", "水平"])
+        self.gradient_direction.addItems(["垂直", "水平", "放射", "斜め"])
         self.gradient_direction.currentIndexChanged.connect(self.on_adjustment_changed)
         direction_layout.addWidget(self.gradient_direction)
         gradient_layout.addLayout(direction_layout)
@@ -991,6 +3612,7 @@ class RichIconGenerator(QMainWindow):
     
     def create_export_tab(self):
         """エクスポートタブの作成"""
+        from PySide6.QtWidgets import QLineEdit
         tab = QWidget()
         layout = QVBoxLayout()
         tab.setLayout(layout)
@@ -1003,7 +3625,11 @@ class RichIconGenerator(QMainWindow):
         self.windows_check.setChecked(True)
         platform_layout.addWidget(self.windows_check)
         
-        self.mac_check = QCheckBox("macOS (.icns / PNG)")
+        self.ico_bmp_check = QCheckBox("    128px未満をBMPで格納（古いWindows向け、ファイルが大きくなります）")
+        self.windows_check.toggled.connect(self.ico_bmp_check.setEnabled)
+        platform_layout.addWidget(self.ico_bmp_check)
+        
+        self.mac_check = QCheckBox("macOS (.icns)")
         self.mac_check.setChecked(True)
         platform_layout.addWidget(self.mac_check)
         
@@ -1032,6 +3658,20 @@ class RichIconGenerator(QMainWindow):
         output_path_layout.addWidget(browse_btn)
         
         output_layout.addLayout(output_path_layout)
+        
+        self.incremental_check = QCheckBox("差分エクスポート（icons フォルダを更新し、変更のないファイルは書き出さない）")
+        output_layout.addWidget(self.incremental_check)
+        
+        png_profile_layout = QHBoxLayout()
+        png_profile_layout.addWidget(QLabel("PNG圧縮:"))
+        self.png_profile_combo = QComboBox()
+        for profile, label in IconExporter.PNG_PROFILE_LABELS.items():
+            self.png_profile_combo.addItem(label, profile)
+        self.png_profile_combo.setCurrentIndex(
+            self.png_profile_combo.findData(IconExporter.DEFAULT_PNG_PROFILE)
+        )
+        png_profile_layout.addWidget(self.png_profile_combo)
+        output_layout.addLayout(png_profile_layout)
         output_group.setLayout(output_layout)
         layout.addWidget(output_group)
         
@@ -1065,7 +3705,7 @@ class RichIconGenerator(QMainWindow):
             "💡 ヒント:\n"
             "• 最高品質のアイコンには1024x1024以上の画像を推奨\n"
             "• 透明背景のPNG形式が最適\n"
-            "• macOS用.icnsはmacでのみ生成可能\n"
+            "• macOS用.icnsはどのOSでも同じものを生成します\n"
             "• 戻る/進むボタンで編集履歴を移動できます"
         )
         info_label.setStyleSheet("""
@@ -1182,160 +3822,207 @@ class RichIconGenerator(QMainWindow):
     
     def add_to_history(self, image):
         """履歴に追加"""
-        # 現在の位置より後ろの履歴を削除
-        self.history = self.history[:self.history_index + 1]
-        
-        # 新しい画像を追加
-        self.history.append(image.copy())
-        
-        # 履歴の最大数を超えたら古いものを削除
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
-        else:
-            self.history_index += 1
+        self.history.push(image)
         
         # ボタンの状態を更新
         self.update_history_buttons()
     
+    def reset_history(self, image):
+        """履歴を1枚の画像から始め直す"""
+        self.history.reset(image)
+        self.update_history_buttons()
+    
     def update_history_buttons(self):
         """履歴ボタンの状態を更新"""
-        self.undo_btn.setEnabled(self.history_index > 0)
-        self.redo_btn.setEnabled(self.history_index < len(self.history) - 1)
+        self.undo_btn.setEnabled(self.history.can_undo())
+        self.redo_btn.setEnabled(self.history.can_redo())
+        self.history_label.setText(self.history.summary() if len(self.history) else '')
     
     def undo(self):
         """1つ前の状態に戻る"""
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.edited_image = self.history[self.history_index].copy()
+        if self.history.can_undo():
+            self.cancel_preview_render()
+            self.edited_image = self.history.undo()
+            self.edited_is_proxy = False
             self.update_preview()
             self.update_history_buttons()
             self.statusBar().showMessage('1つ前の状態に戻しました')
     
     def redo(self):
         """1つ後の状態に進む"""
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            self.edited_image = self.history[self.history_index].copy()
+        if self.history.can_redo():
+            self.cancel_preview_render()
+            self.edited_image = self.history.redo()
+            self.edited_is_proxy = False
             self.update_preview()
             self.update_history_buttons()
             self.statusBar().showMessage('1つ後の状態に進みました')
     
+    def collect_render_params(self):
+        """現在のUI状態からレンダリングパラメータを収集"""
+        # まだ作成していないタブの項目は既定値のまま
+        params = dict(RenderPipeline.DEFAULT_PARAMS)
+        
+        if 'adjust' in self.built_tabs:
+            params.update({
+                'brightness': self.brightness_slider.value(),
+                'contrast': self.contrast_slider.value(),
+                'saturation': self.saturation_slider.value(),
+                'sharpness': self.sharpness_slider.value()
+            })
+        
+        if 'effect' in self.built_tabs:
+            params.update({
+                'blur': self.blur_slider.value(),
+                'rounded_corners': self.rounded_check.isChecked(),
+                'corner_radius': self.corner_radius_slider.value(),
+                'shadow': self.shadow_check.isChecked(),
+                'shadow_blur': self.shadow_blur_slider.value(),
+                'border': self.border_check.isChecked(),
+                'border_width': self.border_width_slider.value(),
+                'glass_effect': self.glass_check.isChecked()
+            })
+        
+        if 'background' in self.built_tabs:
+            direction = AdvancedImageProcessor.GRADIENT_DIRECTIONS[self.gradient_direction.currentIndex()]
+            params.update({
+                'padding': self.padding_slider.value(),
+                'bg_color_enabled': self.bg_color_check.isChecked(),
+                'bg_color': self.bg_color,
+                'gradient': self.gradient_check.isChecked(),
+                'gradient_color1': self.grad_color1,
+                'gradient_color2': self.grad_color2,
+                'gradient_direction': direction
+            })
+        
+        return RenderPipeline.normalize_params(params)
+    
     def on_adjustment_changed(self):
         """調整・エフェクト・背景が変更されたときの処理"""
         if not self.source_image:
             return
         
-        try:
-            # 常にソース画像から開始
-            result = self.source_image.copy()
-            
-            # ステップ1: 調整を適用
-            result = self.apply_adjustments_to_image(result)
-            
-            # ステップ2: エフェクトを適用
-            result = self.apply_effects_to_image(result)
-            
-            # ステップ3: 背景を適用
-            result = self.apply_background_to_image(result)
-            
-            # 結果を保存
-            self.edited_image = result
-            self.update_preview()
-            
-        except Exception as e:
-            print(f"Adjustment error: {e}")
+        # 連続した変更はタイマーでまとめ、最新の状態だけを描画する
+        self.render_timer.start()
     
-    def apply_adjustments_to_image(self, image):
-        """画像に調整を適用"""
-        result = image.copy()
-        
-        # 明るさ
-        brightness_value = self.brightness_slider.value() / 100.0
-        if brightness_value != 0:
-            enhancer = ImageEnhance.Brightness(result)
-            result = enhancer.enhance(1 + brightness_value)
+    def submit_preview_render(self):
+        """現在のパラメータで描画スレッドに描画を依頼"""
+        if not self.source_image:
+            return
         
-        # コントラスト
-        contrast_value = self.contrast_slider.value() / 100.0
-        if contrast_value != 0:
-            enhancer = ImageEnhance.Contrast(result)
-            result = enhancer.enhance(1 + contrast_value)
+        self.ensure_preview_proxy()
+        params = RenderPipeline.scale_params(
+            self.collect_render_params(), self.proxy_scale
+        )
         
-        # 彩度
-        saturation_value = self.saturation_slider.value() / 100.0
-        if saturation_value != 0:
-            enhancer = ImageEnhance.Color(result)
-            result = enhancer.enhance(1 + saturation_value)
+        # 常にソース画像（のプロキシ）から開始
+        self.render_generation = self.render_worker.submit(self.preview_source, params)
+    
+    def on_preview_rendered(self, generation, image):
+        """描画スレッドの結果を反映"""
+        if generation != self.render_generation:
+            return
         
-        # シャープネス
-        sharpness_value = self.sharpness_slider.value() / 100.0
-        if sharpness_value != 0:
-            enhancer = ImageEnhance.Sharpness(result)
-            result = enhancer.enhance(1 + sharpness_value)
+        # 結果を保存
+        self.applied_render_generation = generation
+        self.preview_error = None
+        self.edited_image = image
+        self.edited_is_proxy = self.preview_source is not self.source_image or self.source_partial
+        self.update_preview()
+    
+    def on_preview_error(self, generation, message):
+        """描画スレッドで失敗したときの処理
+        
+        スライダーの操作中は同じエラーが続くので、ダイアログは内容が変わったときだけ出す。
+        描画されなかった調整は書き出し時にフル解像度で描画し直す。
+        """
+        from PySide6.QtWidgets import QMessageBox
+        if generation != self.render_generation:
+            return
+        self.statusBar().showMessage(f'プレビューの描画に失敗しました: {message}')
+        if message != self.preview_error:
+            self.preview_error = message
+            QMessageBox.critical(self, 'エラー', f'プレビューの描画に失敗しました:\n{message}')
+    
+    def cancel_preview_render(self):
+        """保留中・描画中のプレビュー描画を取り消す"""
+        self.render_timer.stop()
+        self.render_worker.cancel()
+        self.render_generation = self.applied_render_generation
+    
+    def preview_render_pending(self):
+        """まだ反映されていないプレビュー描画があるか"""
+        return (
+            self.render_timer.isActive()
+            or self.render_generation != self.applied_render_generation
+        )
+    
+    def closeEvent(self, event):
+        """ウィンドウを閉じるときに描画スレッドとデコード中のスレッドを止める"""
+        self.render_worker.stop()
+        for loader in self.findChildren(SourceLoadThread):
+            loader.wait()
+        super().closeEvent(event)
+    
+    def preview_proxy_size(self):
+        """プレビュー用プロキシの長辺（プレビュー領域と最大のサイズ別プレビューを満たす大きさ）"""
+        return max(
+            self.preview_label.width(),
+            self.preview_label.height(),
+            max(self.size_previews)
+        )
+    
+    def ensure_preview_proxy(self):
+        """プレビュー領域に合わせた縮小プロキシを用意"""
+        target = self.preview_proxy_size()
+        if self.preview_source is not None and max(self.preview_source.size) >= min(
+            target, max(self.source_image.size)
+        ):
+            return
         
-        return result
+        width, height = self.source_image.size
+        scale = min(1.0, target / max(width, height))
+        if scale < 1:
+            proxy_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            self.preview_source = self.source_image.resize(
+                proxy_size, Image.Resampling.LANCZOS
+            )
+            self.proxy_scale = self.source_scale * self.preview_source.width / width
+        else:
+            self.preview_source = self.source_image
+            self.proxy_scale = self.source_scale
+    
+    def source_render_params(self):
+        """現在のパラメータ（元画像のピクセル単位）をソース画像の解像度に合わせる"""
+        return RenderPipeline.scale_params(self.collect_render_params(), self.source_scale)
+    
+    def materialize_edited_image(self):
+        """プロキシで描画中の編集結果をフル解像度で描画し直す"""
+        self.ensure_full_source()
+        pending = self.preview_render_pending()
+        self.cancel_preview_render()
+        if self.edited_is_proxy or pending:
+            self.edited_image = RenderPipeline.render(
+                self.source_image, self.source_render_params()
+            )
+            self.edited_is_proxy = False
+        return self.edited_image
+    
+    def apply_adjustments_to_image(self, image, params=None):
+        """画像に調整を適用"""
+        return RenderPipeline.apply_adjustments(image, params or self.collect_render_params())
     
-    def apply_effects_to_image(self, image):
+    def apply_effects_to_image(self, image, params=None):
         """画像にエフェクトを適用"""
-        result = image.copy()
-        
-        # ぼかし
-        blur_value = self.blur_slider.value()
-        if blur_value > 0:
-            result = result.filter(ImageFilter.GaussianBlur(blur_value / 2))
-        
-        # 角丸
-        if self.rounded_check.isChecked():
-            radius = self.corner_radius_slider.value()
-            result = AdvancedImageProcessor.create_rounded_corners(result, radius)
-        
-        # 枠線
-        if self.border_check.isChecked():
-            width = self.border_width_slider.value()
-            result = AdvancedImageProcessor.add_border(result, width)
-        
-        # ガラス効果
-        if self.glass_check.isChecked():
-            result = AdvancedImageProcessor.apply_glass_effect(result)
-        
-        # 影（最後に適用）
-        if self.shadow_check.isChecked():
-            blur = self.shadow_blur_slider.value()
-            result = AdvancedImageProcessor.add_drop_shadow(result, blur_radius=blur)
-        
-        return result
+        return RenderPipeline.apply_effects(image, params or self.collect_render_params())
     
-    def apply_background_to_image(self, image):
+    def apply_background_to_image(self, image, params=None):
         """画像に背景を適用"""
-        result = image.copy()
-        
-        # パディング
-        padding = self.padding_slider.value()
-        if padding > 0:
-            result = AdvancedImageProcessor.add_padding(result, padding)
-        
-        # 背景色
-        if self.bg_color_check.isChecked():
-            bg = Image.new('RGBA', result.size, self.bg_color)
-            final = Image.new('RGBA', result.size)
-            final.paste(bg, (0, 0))
-            final.paste(result, (0, 0), result)
-            result = final
-        
-        # グラデーション
-        if self.gradient_check.isChecked():
-            direction = 'vertical' if self.gradient_direction.currentIndex() == 0 else 'horizontal'
-            result = AdvancedImageProcessor.add_gradient_background(
-                result,
-                self.grad_color1,
-                self.grad_color2,
-                direction
-            )
-        
-        return result
+        return RenderPipeline.apply_background(image, params or self.collect_render_params())
     
     def select_image(self):
         """画像を選択"""
+        from PySide6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "画像を選択",
@@ -1346,84 +4033,197 @@ class RichIconGenerator(QMainWindow):
             self.load_image(file_path)
     
     def load_image(self, file_path):
-        """画像を読み込み"""
+        """画像を読み込み（デコードはバックグラウンドで行う）"""
+        from PySide6.QtWidgets import QMessageBox
         try:
-            self.source_image = Image.open(file_path)
-            if self.source_image.mode != 'RGBA':
-                self.source_image = self.source_image.convert('RGBA')
-            
-            self.edited_image = self.source_image.copy()
-            
-            # 履歴をリセット
-            self.history = [self.source_image.copy()]
-            self.history_index = 0
-            self.update_history_buttons()
-            
-            self.update_preview()
-            self.statusBar().showMessage(f'画像を読み込みました: {os.path.basename(file_path)}')
-            
-            # 画像情報を表示
-            width, height = self.source_image.size
-            self.status_label.setText(
-                f'サイズ: {width}×{height}px | '
-                f'モード: {self.source_image.mode}'
-            )
-            
+            # ヘッダだけを読んで、開ける画像かどうかを先に確かめる
+            with Image.open(file_path) as image:
+                self.source_info = (os.path.basename(file_path), image.size, image.mode)
         except Exception as e:
             QMessageBox.critical(self, 'エラー', f'画像の読み込みに失敗しました:\n{str(e)}')
+            return
+        
+        # 縮小デコードできる形式は、先にプレビュー用の解像度で表示する。
+        # 書き出しは最大1024pxなので、元の解像度まではデコードしない
+        self.source_generation += 1
+        loader = SourceLoadThread(
+            self.source_generation,
+            file_path,
+            self.preview_proxy_size(),
+            SourceDecoder.working_size(),
+            self
+        )
+        loader.decoded.connect(self.on_source_decoded)
+        loader.error.connect(self.on_source_error)
+        loader.finished.connect(loader.deleteLater)
+        self.source_loader = loader
+        loader.start()
+        self.statusBar().showMessage(f'画像を読み込んでいます: {self.source_info[0]}')
+    
+    def on_source_decoded(self, generation, image, scale, final):
+        """デコードスレッドの結果を反映"""
+        if generation != self.source_generation or self.source_loader is None:
+            return
+        self.install_source(image, scale, final)
+    
+    def on_source_error(self, generation, message):
+        """デコードに失敗したときの処理"""
+        from PySide6.QtWidgets import QMessageBox
+        if generation != self.source_generation:
+            return
+        self.source_loader = None
+        QMessageBox.critical(self, 'エラー', f'画像の読み込みに失敗しました:\n{message}')
+    
+    def ensure_full_source(self):
+        """デコード中の画像があれば、書き出しに必要な解像度が揃うまで待つ"""
+        loader = self.source_loader
+        if loader is None:
+            return
+        self.statusBar().showMessage('画像のデコードを待っています...')
+        loader.wait()
+        # 失敗した場合は error シグナル側で通知する
+        if loader.image is not None:
+            self.install_source(loader.image, loader.scale, True)
+    
+    def install_source(self, image, scale, final):
+        """デコードされた画像をソース画像にする"""
+        # 縮小デコードの段階で調整していた内容は、新しい解像度で描画し直す
+        adjusted = self.source_partial and (
+            self.preview_render_pending()
+            or self.applied_render_generation != self.loaded_render_generation
+        )
+        self.cancel_preview_render()
+        self.source_image = image
+        self.source_scale = scale
+        self.source_partial = not final
+        if final:
+            self.source_loader = None
+        self.preview_source = None
+        self.ensure_preview_proxy()
+        
+        # 履歴をリセット
+        self.reset_history(image)
+        
+        if adjusted:
+            self.submit_preview_render()
+        else:
+            self.edited_image = image.copy()
+            self.edited_is_proxy = self.source_partial
+            self.loaded_render_generation = self.applied_render_generation
+            self.update_preview()
+        
+        # 画像情報を表示
+        name, (width, height), mode = self.source_info
+        text = f'サイズ: {width}×{height}px | モード: {mode}'
+        if scale != 1:
+            text += f' | 作業解像度: {image.width}×{image.height}px'
+        self.status_label.setText(text)
+        if final:
+            self.statusBar().showMessage(f'画像を読み込みました: {name}')
     
     def update_preview(self):
         """プレビューを更新"""
         if not self.edited_image:
             return
         
+        # 画像はその場で書き換えないので、同じオブジェクトなら描画済みの内容と同じ
+        if self.edited_image is self.previewed_image:
+            return
+        
+        with RenderTracer.frame('preview'):
+            self.draw_preview()
+        self.update_timings()
+    
+    def draw_preview(self):
+        """編集画像をメインプレビューとサイズ別プレビューに描画"""
         try:
-            # メインプレビュー
+            # メインプレビュー（アスペクト比を保持して縮小し、共有バッファへ書き込む）
             display_size = 500
-            preview = self.edited_image.copy()
-            
-            # アスペクト比を保持してリサイズ
-            preview.thumbnail((display_size, display_size), Image.Resampling.LANCZOS)
+            with RenderTracer.span('thumbnail'):
+                preview = PreviewBridge.thumbnail(self.edited_image, (display_size, display_size))
+            with RenderTracer.span('qpixmap'):
+                bridge = self.preview_bridge(self.preview_label)
+                bridge.acquire(preview.size).paste(preview)
+                self.preview_label.setPixmap(bridge.pixmap())
             
-            # PIL ImageをQPixmapに変換
-            preview_bytes = preview.tobytes("raw", "RGBA")
-            qimage = QImage(
-                preview_bytes,
-                preview.width,
-                preview.height,
-                preview.width * 4,
-                QImage.Format_RGBA8888
-            )
-            pixmap = QPixmap.fromImage(qimage)
-            self.preview_label.setPixmap(pixmap)
+            # サイズ別プレビュー（メインプレビューから 256→128→64→32→16 と順に縮小）
+            with RenderTracer.span('size_strip'):
+                size_preview = preview
+                for size in sorted(self.size_previews, reverse=True):
+                    label = self.size_previews[size]
+                    size_preview = PreviewBridge.thumbnail(size_preview, (size, size))
+                    
+                    # 共有バッファを背景として中央に配置
+                    bridge = self.preview_bridge(label)
+                    frame = bridge.acquire((size, size))
+                    frame.paste((255, 255, 255, 0), (0, 0, size, size))
+                    offset = ((size - size_preview.width) // 2,
+                             (size - size_preview.height) // 2)
+                    frame.paste(size_preview, offset, size_preview)
+                    label.setPixmap(bridge.pixmap())
             
-            # サイズ別プレビュー
-            for size, label in self.size_previews.items():
-                size_preview = self.edited_image.copy()
-                size_preview.thumbnail((size, size), Image.Resampling.LANCZOS)
-                
-                # 中央配置用の背景を作成
-                bg = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-                offset = ((size - size_preview.width) // 2,
-                         (size - size_preview.height) // 2)
-                bg.paste(size_preview, offset, size_preview)
-                
-                size_bytes = bg.tobytes("raw", "RGBA")
-                size_qimage = QImage(
-                    size_bytes,
-                    size,
-                    size,
-                    size * 4,
-                    QImage.Format_RGBA8888
-                )
-                size_pixmap = QPixmap.fromImage(size_qimage)
-                label.setPixmap(size_pixmap)
+            self.previewed_image = self.edited_image
                 
         except Exception as e:
             print(f"Preview update error: {e}")
     
+    def update_timings(self):
+        """直近の描画・表示・書き出しの内訳をステータスバーに表示"""
+        if not self.show_timings_action.isChecked():
+            return
+        
+        parts = []
+        for name, title in (('render', '描画'), ('preview', '表示'), ('export', '書き出し')):
+            breakdown = RenderTracer.breakdown(name)
+            if breakdown:
+                parts.append(f'{title} {breakdown}')
+        self.timing_label.setText('  '.join(parts))
+    
+    def toggle_timings(self, checked):
+        """処理時間の表示を切り替え"""
+        self.timing_label.setVisible(checked)
+        self.update_timings()
+    
+    def toggle_trace(self, checked):
+        """トレース記録の開始・保存"""
+        from PySide6.QtWidgets import QFileDialog
+        if checked:
+            RenderTracer.start_recording()
+            self.statusBar().showMessage('トレースを記録中...')
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "トレースを保存", "trace.json", "Chromeトレース (*.json)"
+        )
+        count = RenderTracer.stop_recording(file_path or None)
+        if file_path:
+            self.statusBar().showMessage(f'トレースを保存しました（{count}件）: {file_path}')
+    
+    def toggle_profile(self, checked):
+        """プロファイル記録の開始・保存"""
+        from PySide6.QtWidgets import QFileDialog
+        if checked:
+            RenderTracer.start_profiling()
+            self.statusBar().showMessage('プロファイルを記録中...')
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "プロファイルを保存", "profile.prof", "プロファイル (*.prof)"
+        )
+        RenderTracer.stop_profiling(file_path or None)
+        if file_path:
+            self.statusBar().showMessage(f'プロファイルを保存しました: {file_path}')
+    
+    def preview_bridge(self, label):
+        """ラベルに対応する共有バッファを返す"""
+        bridge = self.preview_bridges.get(label)
+        if bridge is None:
+            bridge = self.preview_bridges[label] = PreviewBridge()
+        return bridge
+    
     def show_preset_dialog(self):
         """プリセット選択ダイアログを表示"""
+        from PySide6.QtWidgets import QMessageBox
         if not self.source_image:
             QMessageBox.warning(self, '警告', '先に画像を選択してください')
             return
@@ -1436,14 +4236,22 @@ class RichIconGenerator(QMainWindow):
     
     def apply_preset(self, preset_name):
         """プリセットを適用"""
+        from PySide6.QtWidgets import QMessageBox
+        self.ensure_full_source()
         if not self.source_image:
             return
         
         try:
-            self.edited_image = PresetManager.apply_preset(
-                self.source_image.copy(),
-                preset_name
+            self.cancel_preview_render()
+            # 同じ画像とプリセットの結果は、前回のセッションやバッチ処理の分も使い回す
+            _, self.edited_image = DiskRenderCache.default().render(
+                self.source_image,
+                {'preset': preset_name, 'scale': self.source_scale},
+                lambda: PresetManager.apply_preset(
+                    self.source_image.copy(), preset_name, self.source_scale
+                )
             )
+            self.edited_is_proxy = False
             self.current_preset = preset_name
             self.current_preset_label.setText(preset_name)
             
@@ -1458,73 +4266,61 @@ class RichIconGenerator(QMainWindow):
     
     def reset_adjustments(self):
         """調整をリセット"""
+        if 'adjust' not in self.built_tabs:
+            return
         self.brightness_slider.setValue(0)
         self.contrast_slider.setValue(0)
         self.saturation_slider.setValue(0)
         self.sharpness_slider.setValue(0)
     
-    def rotate_image(self, angle):
-        """画像を回転"""
+    def apply_history_op(self, op, message):
+        """決定的な操作を適用して操作ログに記録"""
         if not self.edited_image:
             return
         
-        self.edited_image = self.edited_image.rotate(angle, expand=True)
-        self.add_to_history(self.edited_image)
+        source = self.materialize_edited_image()
+        self.edited_image = op(source)
+        self.history.push_op(self.edited_image, source, op)
+        self.update_history_buttons()
         self.update_preview()
-        self.statusBar().showMessage(f'{angle}度回転しました')
+        self.statusBar().showMessage(message)
+    
+    def rotate_image(self, angle):
+        """画像を回転"""
+        self.apply_history_op(
+            functools.partial(Image.Image.rotate, angle=angle, expand=True),
+            f'{angle}度回転しました'
+        )
     
     def flip_horizontal(self):
         """水平反転"""
-        if not self.edited_image:
-            return
-        
-        self.edited_image = self.edited_image.transpose(Image.FLIP_LEFT_RIGHT)
-        self.add_to_history(self.edited_image)
-        self.update_preview()
-        self.statusBar().showMessage('水平反転しました')
+        self.apply_history_op(
+            functools.partial(Image.Image.transpose, method=Image.FLIP_LEFT_RIGHT),
+            '水平反転しました'
+        )
     
     def flip_vertical(self):
         """垂直反転"""
-        if not self.edited_image:
-            return
-        
-        self.edited_image = self.edited_image.transpose(Image.FLIP_TOP_BOTTOM)
-        self.add_to_history(self.edited_image)
-        self.update_preview()
-        self.statusBar().showMessage('垂直反転しました')
+        self.apply_history_op(
+            functools.partial(Image.Image.transpose, method=Image.FLIP_TOP_BOTTOM),
+            '垂直反転しました'
+        )
     
     def apply_circular_mask(self):
         """円形マスクを適用"""
-        if not self.edited_image:
-            return
-        
-        self.edited_image = AdvancedImageProcessor.create_circular_mask(
-            self.edited_image
-        )
-        self.add_to_history(self.edited_image)
-        self.update_preview()
-        self.statusBar().showMessage('円形マスクを適用しました')
+        self.apply_history_op(AdvancedImageProcessor.create_circular_mask, '円形マスクを適用しました')
+    
+    def apply_squircle_mask(self):
+        """スクワークルマスクを適用"""
+        self.apply_history_op(AdvancedImageProcessor.create_squircle_mask, 'スクワークルマスクを適用しました')
     
     def crop_to_square(self):
         """正方形にトリミング"""
-        if not self.edited_image:
-            return
-        
-        width, height = self.edited_image.size
-        size = min(width, height)
-        
-        left = (width - size) // 2
-        top = (height - size) // 2
-        right = left + size
-        bottom = top + size
-        
-        self.edited_image = self.edited_image.crop((left, top, right, bottom))
-        self.add_to_history(self.edited_image)
-        self.update_preview()
-        self.statusBar().showMessage('正方形にトリミングしました')
+        self.apply_history_op(AdvancedImageProcessor.crop_to_square, '正方形にトリミングしました')
     
     def select_background_color(self):
         """背景色を選択"""
+        from PySide6.QtWidgets import QColorDialog
         color = QColorDialog.getColor()
         if color.isValid():
             self.bg_color = (color.red(), color.green(), color.blue(), 255)
@@ -1537,6 +4333,7 @@ class RichIconGenerator(QMainWindow):
     
     def select_gradient_color(self, color_num):
         """グラデーション色を選択"""
+        from PySide6.QtWidgets import QColorDialog
         color = QColorDialog.getColor()
         if color.isValid():
             rgb = (color.red(), color.green(), color.blue())
@@ -1559,6 +4356,7 @@ class RichIconGenerator(QMainWindow):
     
     def select_output_folder(self):
         """出力フォルダを選択"""
+        from PySide6.QtWidgets import QFileDialog
         folder = QFileDialog.getExistingDirectory(self, "出力フォルダを選択")
         if folder:
             self.output_path_edit.setText(folder)
@@ -1567,36 +4365,40 @@ class RichIconGenerator(QMainWindow):
         """画像をリセット"""
         if self.source_image:
             self.edited_image = self.source_image.copy()
+            self.edited_is_proxy = self.source_partial
             
-            # すべてのスライダーをリセット
+            # すべてのスライダーとチェックボックスをリセット（未作成のタブは既定値のまま）
             self.reset_adjustments()
-            self.blur_slider.setValue(0)
-            self.corner_radius_slider.setValue(30)
-            self.shadow_blur_slider.setValue(15)
-            self.border_width_slider.setValue(5)
-            self.padding_slider.setValue(0)
-            
-            # チェックボックスをリセット
-            self.rounded_check.setChecked(False)
-            self.shadow_check.setChecked(False)
-            self.border_check.setChecked(False)
-            self.glass_check.setChecked(False)
-            self.bg_color_check.setChecked(False)
-            self.gradient_check.setChecked(False)
+            if 'effect' in self.built_tabs:
+                self.blur_slider.setValue(0)
+                self.corner_radius_slider.setValue(30)
+                self.shadow_blur_slider.setValue(15)
+                self.border_width_slider.setValue(5)
+                self.rounded_check.setChecked(False)
+                self.shadow_check.setChecked(False)
+                self.border_check.setChecked(False)
+                self.glass_check.setChecked(False)
+            if 'background' in self.built_tabs:
+                self.padding_slider.setValue(0)
+                self.bg_color_check.setChecked(False)
+                self.gradient_check.setChecked(False)
             
             self.current_preset = None
             self.current_preset_label.setText('選択なし')
             
+            # リセット中のスライダー変更による描画は不要
+            self.cancel_preview_render()
+            
             # 履歴をリセット
-            self.history = [self.source_image.copy()]
-            self.history_index = 0
-            self.update_history_buttons()
+            self.reset_history(self.edited_image)
             
             self.update_preview()
             self.statusBar().showMessage('画像をリセットしました')
     
     def export_icons(self):
         """アイコンをエクスポート"""
+        from PySide6.QtWidgets import QMessageBox
+        self.ensure_full_source()
         if not self.edited_image:
             QMessageBox.warning(self, '警告', '先に画像を選択してください')
             return
@@ -1617,10 +4419,17 @@ class RichIconGenerator(QMainWindow):
         if not any(options.values()):
             QMessageBox.warning(self, '警告', '少なくとも1つのプラットフォームを選択してください')
             return
+        options['png_profile'] = self.png_profile_combo.currentData()
+        options['ico_bmp'] = self.ico_bmp_check.isChecked()
         
-        # タイムスタンプ付きフォルダを作成
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_folder = os.path.join(output_path, f"icons_{timestamp}")
+        # 差分エクスポートは固定のフォルダ、それ以外はタイムスタンプ付きフォルダに書き出す
+        incremental = self.incremental_check.isChecked()
+        if incremental:
+            output_folder = os.path.join(output_path, "icons")
+        else:
+            from datetime import datetime
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_folder = os.path.join(output_path, f"icons_{timestamp}")
         os.makedirs(output_folder, exist_ok=True)
         
         # プログレスバーを表示
@@ -1628,10 +4437,20 @@ class RichIconGenerator(QMainWindow):
         self.progress_bar.setValue(0)
         
         # バックグラウンドスレッドで生成
+        # プロキシ表示中はフル解像度の描画をスレッド側で行う
+        if self.edited_is_proxy or self.preview_render_pending():
+            export_source = self.source_image
+            render_params = self.source_render_params()
+        else:
+            export_source = self.edited_image
+            render_params = None
+        
         self.generator_thread = IconGeneratorThread(
-            self.edited_image,
+            export_source,
             output_folder,
-            options
+            options,
+            render_params,
+            incremental
         )
         
         self.generator_thread.progress.connect(self.progress_bar.setValue)
@@ -1644,16 +4463,25 @@ class RichIconGenerator(QMainWindow):
     
     def on_export_finished(self, message):
         """エクスポート完了時の処理"""
+        from PySide6.QtWidgets import QMessageBox
         self.progress_bar.setVisible(False)
         self.statusBar().showMessage(message)
+        self.update_timings()
         
-        QMessageBox.information(
-            self,
+        # ファイルごとのバイト数とエンコード時間は「詳細」に表示する
+        report = self.generator_thread.report
+        box = QMessageBox(
+            QMessageBox.Information,
             '完了',
-            f'{message}\n\n出力先:\n{self.output_path_edit.text()}'
+            f'{message}\n\n出力先:\n{self.output_path_edit.text()}',
+            parent=self
         )
+        if report:
+            box.setDetailedText(format_export_report(report))
+        box.exec()
         
         # 出力フォルダを開く
+        import platform
         output_path = self.output_path_edit.text()
         if platform.system() == 'Darwin':
             os.system(f'open "{output_path}"')
@@ -1664,13 +4492,197 @@ class RichIconGenerator(QMainWindow):
     
     def on_export_error(self, error_message):
         """エクスポートエラー時の処理"""
+        from PySide6.QtWidgets import QMessageBox
         self.progress_bar.setVisible(False)
         self.statusBar().showMessage('エラーが発生しました')
         QMessageBox.critical(self, 'エラー', error_message)
 
 
-def main():
-    app = QApplication(sys.argv)
+BATCH_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+BATCH_TARGETS = ('windows', 'macos', 'png_set', 'favicon')
+
+
+def collect_batch_sources(patterns, recursive=False):
+    """フォルダまたはglobパターンから処理対象の画像を収集"""
+    sources = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walker = Path(pattern).rglob('*') if recursive else Path(pattern).iterdir()
+            candidates = [str(p) for p in walker if p.is_file()]
+        else:
+            import glob
+            candidates = glob.glob(pattern, recursive=True)
+        
+        for candidate in candidates:
+            if candidate.lower().endswith(BATCH_IMAGE_EXTENSIONS):
+                sources.append(os.path.abspath(candidate))
+    
+    # 重複を除き、順序を安定させる
+    return sorted(set(sources))
+
+
+def batch_output_names(sources):
+    """ソースごとの出力フォルダ名（同名ファイルは連番で区別）"""
+    names = {}
+    used = set()
+    for source in sources:
+        stem = Path(source).stem
+        name = stem
+        index = 2
+        while name in used:
+            name = f"{stem}_{index}"
+            index += 1
+        used.add(name)
+        names[source] = name
+    return names
+
+
+def render_batch_image(source_path, output_folder, preset_name, params, options,
+                       incremental=False, cache_dir=None):
+    """1枚の画像をレンダリングしてアイコンを書き出す（ワーカープロセスで実行）
+    
+    書き出したファイルごとの (相対パス, バイト数, エンコード時間[秒]) を返す。
+    """
+    # 出力に必要な解像度までしかデコードしない
+    image, scale = SourceDecoder.decode(source_path, SourceDecoder.working_size())
+    
+    if preset_name:
+        recipe = {'preset': preset_name, 'scale': scale}
+        render = functools.partial(
+            PresetManager.apply_preset, preset_name=preset_name, scale=scale
+        )
+    else:
+        recipe = RenderPipeline.scale_params(params, scale)
+        render = functools.partial(RenderPipeline.render, params=recipe)
+    
+    os.makedirs(output_folder, exist_ok=True)
+    # 並列化はプロセス単位で行うので、書き出しは各プロセス内で逐次に行う
+    report = []
+    IconExporter.render_and_export(
+        image, output_folder, options, recipe, render,
+        incremental=incremental,
+        disk_cache=DiskRenderCache.shared(cache_dir),
+        max_workers=1,
+        report=lambda *entry: report.append(entry)
+    )
+    return report
+
+
+def batch_main(argv=None):
+    """ディスプレイ不要のバッチ処理エントリポイント"""
+    from concurrent.futures import as_completed
+    import argparse
+    import textwrap
+    parser = argparse.ArgumentParser(
+        prog='main.py batch',
+        description='フォルダ内の画像からアイコンセットを一括生成します'
+    )
+    parser.add_argument('sources', nargs='+', help='画像フォルダまたはglobパターン')
+    parser.add_argument('-o', '--output', required=True, help='出力フォルダ')
+    style_group = parser.add_mutually_exclusive_group()
+    style_group.add_argument(
+        '--preset', choices=list(PresetManager.PRESETS), help='適用するプリセット名'
+    )
+    style_group.add_argument('--params', help='パラメータファイル(JSON)')
+    parser.add_argument(
+        '--targets', default=','.join(BATCH_TARGETS),
+        help=f"出力形式（カンマ区切り: {', '.join(BATCH_TARGETS)}）"
+    )
+    parser.add_argument(
+        '-j', '--workers', type=int, default=os.cpu_count() or 1,
+        help='ワーカープロセス数（既定: CPUコア数）'
+    )
+    parser.add_argument('-r', '--recursive', action='store_true', help='サブフォルダも検索')
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='出力フォルダのマニフェストと比べ、入力が変わっていないファイルは書き出さない'
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        '--cache-dir', default=DiskRenderCache.default_root(),
+        help='レンダリング結果のキャッシュフォルダ（既定: ICON_RENDER_CACHE またはユーザーのキャッシュフォルダ）'
+    )
+    cache_group.add_argument(
+        '--no-cache', dest='cache_dir', action='store_const', const=None,
+        help='レンダリング結果のキャッシュを使わない'
+    )
+    parser.add_argument(
+        '--png-profile', choices=list(IconExporter.PNG_PROFILES),
+        default=IconExporter.DEFAULT_PNG_PROFILE,
+        help='PNGエンコードのプロファイル（fast: 速さ優先 / smallest: 複数の圧縮方法を試して最小のもの）'
+    )
+    parser.add_argument(
+        '--ico-bmp', action='store_true',
+        help='Windowsの .ico で128px未満の要素を非圧縮のBMPで格納（古いシェル向け。ファイルは大きくなる）'
+    )
+    parser.add_argument(
+        '--report', action='store_true', help='書き出したファイルごとのバイト数とエンコード時間を表示'
+    )
+    args = parser.parse_args(argv)
+    
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    unknown = [t for t in targets if t not in BATCH_TARGETS]
+    if unknown or not targets:
+        parser.error(f"不明な出力形式: {', '.join(unknown) or '(なし)'}")
+    options = {target: target in targets for target in BATCH_TARGETS}
+    options['png_profile'] = args.png_profile
+    options['ico_bmp'] = args.ico_bmp
+    
+    params = RenderPipeline.load_params(args.params) if args.params else RenderPipeline.normalize_params()
+    
+    sources = collect_batch_sources(args.sources, args.recursive)
+    if not sources:
+        print('処理対象の画像が見つかりませんでした', file=sys.stderr)
+        return 1
+    
+    names = batch_output_names(sources)
+    workers = max(1, args.workers)
+    failures = 0
+    start = time.perf_counter()
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=IconExporter.init_file_mode,
+        initargs=(IconExporter.FILE_MODE,)
+    ) as executor:
+        futures = {
+            executor.submit(
+                render_batch_image,
+                source,
+                os.path.join(args.output, names[source]),
+                args.preset,
+                params,
+                options,
+                args.incremental,
+                args.cache_dir
+            ): source
+            for source in sources
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            source = futures[future]
+            try:
+                report = future.result()
+                print(f"[{done}/{len(sources)}] {source}")
+                if args.report and report:
+                    print(textwrap.indent(format_export_report(report), '    '))
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(sources)}] 失敗: {source}: {e}", file=sys.stderr)
+    
+    elapsed = time.perf_counter() - start
+    processed = len(sources) - failures
+    throughput = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{processed}/{len(sources)}枚を{elapsed:.2f}秒で処理しました "
+        f"({throughput:.2f} 枚/秒, ワーカー数: {workers})"
+    )
+    return 1 if failures else 0
+
+
+def create_application(argv):
+    """QApplicationを作成してスタイルとパレットを設定"""
+    app = QApplication(argv)
     
     # アプリケーション情報
     app.setApplicationName("Professional Icon Generator")
@@ -1694,6 +4706,72 @@ def main():
     palette.setColor(QPalette.Highlight, QColor(76, 175, 80))
     palette.setColor(QPalette.HighlightedText, QColor(255, 255, 255))
     app.setPalette(palette)
+    return app
+
+
+class FirstPaintWatcher(QObject):
+    """ウィンドウの最初の描画イベントで時刻を記録し、イベントループを終了する"""
+    
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self.painted_at = None
+    
+    def eventFilter(self, obj, event):
+        from PySide6.QtCore import QEvent
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+            QTimer.singleShot(0, self.app.quit)
+        return False
+
+
+def startup_main(argv=None):
+    """起動から最初の描画までの時間を計測して表示"""
+    entered = time.perf_counter()
+    
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='main.py startup',
+        description='起動（モジュール読み込み開始）から最初の描画までの時間を計測'
+    )
+    parser.add_argument(
+        '--budget', type=float, help='最初の描画までの許容時間（ミリ秒）。超えた場合は終了コード1'
+    )
+    args = parser.parse_args(argv)
+    
+    app = create_application(sys.argv[:1])
+    app_ready = time.perf_counter()
+    window = RichIconGenerator()
+    window_ready = time.perf_counter()
+    
+    watcher = FirstPaintWatcher(app)
+    window.installEventFilter(watcher)
+    window.show()
+    # 描画イベントが来ない環境でも終了する
+    QTimer.singleShot(10000, app.quit)
+    app.exec()
+    window.close()
+    
+    if watcher.painted_at is None:
+        print('最初の描画を検出できませんでした')
+        return 1
+    
+    first_paint = (watcher.painted_at - STARTUP_TIME) * 1000
+    print('起動時間（モジュール読み込み開始から）')
+    print(f'  import:           {(entered - STARTUP_TIME) * 1000:8.1f} ms')
+    print(f'  QApplication:     {(app_ready - entered) * 1000:8.1f} ms')
+    print(f'  ウィンドウ作成:   {(window_ready - app_ready) * 1000:8.1f} ms')
+    print(f'  表示〜描画:       {(watcher.painted_at - window_ready) * 1000:8.1f} ms')
+    print(f'  最初の描画まで:   {first_paint:8.1f} ms')
+    
+    if args.budget is not None and first_paint > args.budget:
+        print(f'予算 {args.budget:.0f} ms を超えています')
+        return 1
+    return 0
+
+
+def main():
+    app = create_application(sys.argv)
     
     window = RichIconGenerator()
     window.show()
@@ -1702,4 +4780,14 @@ def main():
 
 
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # 実行ファイル化した場合は一括処理のワーカープロセスの起動に必要
+        import multiprocessing
+        multiprocessing.freeze_support()
+    # スレッドやワーカーを作る前に、書き出すファイルの権限を決めておく
+    IconExporter.init_file_mode()
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'startup':
+        sys.exit(startup_main(sys.argv[2:]))
     main()
\ No newline at end of file